@@ -3,11 +3,196 @@
 # Date: July 1, 2020
 # Description: Tests pa1 for comp 370, fall 2020
 
+import io
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+
 import pa1
 
+# Number of failed checks: the tests exit with status 1 if there are any
+failures = 0
+
 def read_results_file(filename):
-    file = open(filename)
-    return [True if result == "Accept" else False for result in file.read().split()]
+    with open(filename) as file:
+        return [True if result == "Accept" else False for result in file.read().split()]
+
+def check_results(description, results, correct_results):
+    global failures
+    print(f"Testing {description}")
+    if results == correct_results:
+        print("  Correct results")
+    else:
+        print("  Incorrect results")
+        failures += 1
+        print(f"  Your results = {results}")
+        print(f"  Correct results = {correct_results}")
+    print()
+
+def read_strings(filename):
+    with open(filename) as string_file:
+        return [str.strip() for str in string_file]
+
+def test_simulate_stream():
+    # Every input is split into chunks of a few symbols, so most transitions cross a chunk boundary
+    for i in range(1, 11):
+        dfa = pa1.DFA(f"dfa{i}.txt")
+        strings = read_strings(f"str{i}.txt")
+        results = []
+        for string in strings:
+            data = string.encode()
+            # An mmap cannot be empty, so the file ends in a newline that is not read
+            with tempfile.TemporaryFile() as file:
+                file.write(data + b"\n")
+                file.flush()
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                    with memoryview(mapped_file) as buffer:
+                        mapped_result = dfa.simulate_stream(buffer[:len(data)], chunk_size=2)
+            results.append((dfa.simulate_stream(data, chunk_size=3),
+                            dfa.simulate_stream(io.BytesIO(data), chunk_size=2),
+                            dfa.simulate_stream(string[j:j + 3] for j in range(0, len(string), 3)),
+                            mapped_result))
+        check_results(f"simulate_stream dfa{i}.txt", results, [(result,) * 4 for result in map(dfa.simulate, strings)])
+
+def minimal_num_states(dfa):
+    # Moore's algorithm: refine the partition of the reachable states (and of the
+    # trap state 0 for missing transitions) until no symbol splits a block
+    def next_state(state, symbol):
+        return dfa.transitions.get((state, symbol), 0)
+    states, stack = {dfa.start_state}, [dfa.start_state]
+    while stack:
+        state = stack.pop()
+        for symbol in dfa.alphabet:
+            if next_state(state, symbol) not in states:
+                states.add(next_state(state, symbol))
+                stack.append(next_state(state, symbol))
+    blocks = {state: state in dfa.accept_states for state in states}
+    while True:
+        signatures = {state: (blocks[state],) + tuple(blocks[next_state(state, symbol)] for symbol in dfa.alphabet)
+                      for state in states}
+        if len(set(signatures.values())) == len(set(blocks.values())):
+            return len(set(blocks.values()))
+        blocks = signatures
+
+def test_minimize():
+    for i in range(1, 11):
+        dfa = pa1.DFA(f"dfa{i}.txt")
+        strings = read_strings(f"str{i}.txt")
+        correct_results = [(dfa.simulate(string),) * 2 for string in strings]
+        num_states = minimal_num_states(dfa)
+        dfa.minimize()
+        results = [dfa.simulate(string) for string in strings]
+        # Minimizing a minimal DFA keeps its size
+        minimized_num_states = dfa.num_states
+        dfa.minimize()
+        results = list(zip(results, [dfa.simulate(string) for string in strings]))
+        check_results(f"minimize dfa{i}.txt", (minimized_num_states, dfa.num_states, results),
+                      (num_states, num_states, correct_results))
+
+def test_binary_format():
+    with tempfile.TemporaryDirectory() as directory:
+        binary_filename = os.path.join(directory, "dfa.bin")
+        text_filename = os.path.join(directory, "dfa.txt")
+        for i in range(1, 11):
+            dfa = pa1.DFA(f"dfa{i}.txt")
+            strings = read_strings(f"str{i}.txt")
+            dfa.writeBinary(binary_filename)
+            loaded_dfa = pa1.DFA(binary_filename)
+            # A loaded DFA decompiles to write the text format again
+            loaded_dfa.writeDFA(text_filename)
+            rewritten_dfa = pa1.DFA(text_filename)
+            results = [(loaded_dfa.simulate(string), loaded_dfa.simulate_stream(string.encode()),
+                        rewritten_dfa.simulate(string)) for string in strings]
+            check_results(f"binary format dfa{i}.txt", (loaded_dfa.num_states, loaded_dfa.alphabet, results),
+                          (dfa.num_states, dfa.alphabet, [(dfa.simulate(string),) * 3 for string in strings]))
+
+        # Files of another version of the format are rejected
+        with open(binary_filename, "r+b") as binary_file:
+            binary_file.seek(len(pa1.BINARY_MAGIC))
+            binary_file.write((pa1.BINARY_VERSION + 1).to_bytes(4, "little"))
+        try:
+            pa1.DFA(binary_filename)
+            check_results("binary format version", None, "ValueError")
+        except ValueError:
+            check_results("binary format version", "ValueError", "ValueError")
+
+def sink_states(dfa):
+    # A state is a sink if every state reachable from it has the same acceptance
+    sinks = set()
+    for start_state in range(1, dfa.num_states + 1):
+        reachable, stack = {start_state}, [start_state]
+        while stack:
+            state = stack.pop()
+            for symbol in dfa.alphabet:
+                next_state = dfa.transitions.get((state, symbol), 0)
+                if next_state not in reachable:
+                    reachable.add(next_state)
+                    stack.append(next_state)
+        if len({state in dfa.accept_states for state in reachable}) == 1:
+            sinks.add(start_state)
+    return sinks
+
+def read_until_sink(chunks):
+    # Fails the test if simulate_stream reads past the chunks
+    yield from chunks
+    raise AssertionError("read past a sink state")
+
+def test_sinks():
+    for i in range(1, 11):
+        dfa = pa1.DFA(f"dfa{i}.txt")
+        sink_rows = dfa.sinkRows()
+        found_sinks = {state for state, row in dfa.state_ids.items() if sink_rows[row]}
+        check_results(f"sinks of dfa{i}.txt", (found_sinks, sink_rows[-1]), (sink_states(dfa), 1))
+
+    # "11" takes dfa1.txt to the universal-accept state 3, and "bbb" takes
+    # dfa9.txt to the dead state 1, after which the input is not read any more
+    dfa1, dfa9 = pa1.DFA("dfa1.txt"), pa1.DFA("dfa9.txt")
+    results = [simulate_outcome(dfa1.simulate, "11x"), simulate_outcome(dfa9.simulate, "bbbx"),
+               simulate_outcome(dfa9.simulate, "ax"), dfa1.simulate_stream(read_until_sink(["1", "1"])),
+               dfa9.simulate_stream(read_until_sink([b"ab", b"bb"]))]
+    check_results("simulate stops at sinks", results, [True, False, "KeyError 'x'", True, False])
+
+    # simulate_many agrees with simulate on symbols after a sink, in and out of lockstep
+    batches = [(dfa1, ["11x", "11" + "0" * 100 + "x", "1", ""]), (dfa9, ["bbbx", "ab", "bbb" + "x" * 100]),
+               (dfa9, ["bbbx", "ax"])]
+    results = [simulate_outcome(lambda: [bool(result) for result in dfa.simulate_many(strings)]) for dfa, strings in batches]
+    correct_results = [simulate_outcome(lambda: [dfa.simulate(string) for string in strings]) for dfa, strings in batches]
+    check_results("simulate_many stops at sinks", (results, correct_results[2]), (correct_results, "KeyError 'x'"))
+
+def simulate_outcome(simulate, *args, **kwargs):
+    try:
+        return simulate(*args, **kwargs)
+    except KeyError as err:
+        return f"KeyError {err}"
+
+# Runs simulate_parallel with spawned workers, whose shared memory handling
+# is reported on stderr: leaked segments, or workers attaching after unlink
+PARALLEL_SCRIPT = """
+import multiprocessing
+import subprocess
+import sys
+
+import pa1
+if __name__ == "__main__":
+    multiprocessing.set_start_method("spawn")
+    dfa = pa1.DFA("dfa1.txt")
+    for i in range(5):
+        dfa.simulate_parallel(b"11" + b"01" * 200000, workers=4, min_chunk_size=1000)
+"""
+
+def test_simulate_parallel():
+    # "11" takes dfa1.txt to a sink row, after which the other chunks are not needed,
+    # and a symbol outside the alphabet is only an error if it is read before that
+    dfa = pa1.DFA("dfa1.txt")
+    inputs = ["0110" * 5000, "11" + "01" * 10000, "11x" + "01" * 10000, "11" + "01" * 10000 + "x",
+              "0" * 10000 + "x" + "1" * 10000, "x" + "0" * 20000]
+    results = [simulate_outcome(dfa.simulate_parallel, string.encode(), workers=4, min_chunk_size=1000) for string in inputs]
+    check_results("simulate_parallel against simulate", results, [simulate_outcome(dfa.simulate, string) for string in inputs])
+
+    process = subprocess.run([sys.executable, "-c", PARALLEL_SCRIPT], capture_output=True, text=True, timeout=300)
+    check_results("simulate_parallel shared memory", (process.returncode, process.stderr), (0, ""))
 
 if __name__ == "__main__":
     test_dfa_files = ["dfa1.txt", "dfa2.txt", "dfa3.txt", "dfa4.txt", "dfa5.txt",
@@ -25,26 +210,68 @@ if __name__ == "__main__":
             # Create DFA
             dfa = pa1.DFA(test_dfa_files[i])
 
-            # Open string file.
-            string_file = open(test_string_files[i])
+            # Read the test strings
+            with open(test_string_files[i]) as string_file:
+                strings = [str.strip() for str in string_file]
 
             # Simulate DFA on test strings
             results = []
-            for str in string_file:
-                results.append(dfa.simulate(str.strip()))
+            for str in strings:
+                results.append(dfa.simulate(str))
+
+            # Simulate all test strings at once, which has to agree with simulate
+            batch_results = [bool(result) for result in dfa.simulate_many(strings)]
 
             # Get correct results
             correct_results = read_results_file(correct_output_files[i])
 
             # Check if correct
-            if results == correct_results:
+            if results == correct_results and batch_results == results:
                 print("  Correct results")
             else:
                 print("  Incorrect results")
+                failures += 1
                 print(f"  Your results = {results}")
                 print(f"  Correct results = {correct_results}")
+                print(f"  simulate_many results = {batch_results}")
             print()
         except OSError as err:
             print(f"Could not open file: {err}")
+            failures += 1
         except Exception as err:
-            print(f"Error simulating dfa: {err}")
\ No newline at end of file
+            print(f"Error simulating dfa: {err}")
+            failures += 1
+
+    try:
+        test_simulate_parallel()
+    except Exception as err:
+        print(f"Error simulating dfa in parallel: {err}")
+        failures += 1
+
+    try:
+        test_simulate_stream()
+    except Exception as err:
+        print(f"Error simulating dfa on streams: {err}")
+        failures += 1
+
+    try:
+        test_minimize()
+    except Exception as err:
+        print(f"Error minimizing dfa: {err}")
+        failures += 1
+
+    try:
+        test_binary_format()
+    except Exception as err:
+        print(f"Error loading binary dfa: {err}")
+        failures += 1
+
+    try:
+        test_sinks()
+    except Exception as err:
+        print(f"Error finding sinks: {err}")
+        failures += 1
+
+    if failures:
+        print(f"{failures} failed checks")
+        sys.exit(1)
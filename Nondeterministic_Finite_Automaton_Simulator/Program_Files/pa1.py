@@ -7,16 +7,50 @@
 # reports if the string is accepted by 'M'. Reads in a 
 # definition of a DFA 'M', reads in a string, evaluates.
 
+import argparse
+import bisect
+import mmap
+import os
+import struct
 import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Event, shared_memory
+
+try:
+	import numpy as np
+except ImportError: # NumPy is only needed by simulate_many
+	np = None
+
+# Binary DFA file format (see DFA.writeBinary): magic, version, number of states,
+# row width, number of table rows, start row offset, alphabet size in bytes,
+# symbols size in bytes, number of symbols and accept bitmap size in bytes.
+# Every number in the file is little-endian.
+BINARY_MAGIC = b'DFAB'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sI8I')
 
 class DFA:
 	""" Simulates a DFA """
 
+	# Symbols read before the first check for a sink row (see findSinks); the
+	# blocks read between checks then double, up to max_sink_check_interval
+	sink_check_interval = 64
+	max_sink_check_interval = 1 << 16
+
 	def __init__(self, filename):
 		"""
 		Initializes DFA from the file whose name is
-		filename
+		filename. Files in the binary DFA format (see
+		writeBinary) are loaded with loadBinary instead.
 		"""
+		with open(filename, 'rb') as dfa_file:
+			is_binary = dfa_file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+		if is_binary:
+			self.loadBinary(filename)
+			return
+
 		with open(filename, 'r') as dfa_file:
 			self.num_states = int(dfa_file.readline())
 			self.alphabet = dfa_file.readline().rstrip('\n')
@@ -33,7 +67,7 @@ class DFA:
 				# Line contains more than one item, it's a transition mapping. Else, it's a start state.
 				if len(token_list) > 1:
 
-					# DFA transition function: (state, symbol) --> state
+					# DFA transition function: (state, symbol or interval label) --> state
 					self.transitions[(int(token_list[0]), token_list[1].strip("\'"))] = int(token_list[2])
 				else: 
 					self.start_state = int(token_list[0])
@@ -47,17 +81,848 @@ class DFA:
     		
 		dfa_file.close()
 
+		self.compile()
+
+	@staticmethod
+	def labelInterval(label):
+		"""
+		Returns the first and last symbol of the symbols that a transition
+		label stands for. An interval label such as 'a-z' stands for every
+		symbol from its first to its last character, and any other label for
+		itself alone.
+		"""
+		if len(label) == 3 and label[1] == '-':
+			return label[0], label[2]
+		return label, label
+
+	def compile(self):
+		"""
+		Compiles the transitions dictionary into a dense transition table.
+
+		Symbols that every state moves on alike (an alphabet equivalence
+		class) share a small integer id, and each state has a row of row_width
+		entries, one per class, in a flat table: symbol_ids is the symbol to
+		class lookup table. Entries hold the offset of the
+		destination state's row (row index * row_width), so one simulation step
+		is a single lookup: table[state + symbol_id]. An extra row at the end is
+		a rejecting trap for any transition missing from the file. Accept states
+		are kept as a bitmap over row indices.
+
+		Interval labels are not expanded into their symbols: the sorted symbols
+		are cut at the first and last symbol of every label (see labelInterval),
+		and the classes are found from the columns of the segments between cuts.
+		"""
+
+		# Alphabet symbols, and any symbol only seen in a transition
+		symbols = dict.fromkeys(self.alphabet)
+		for (state, label) in self.transitions:
+			if self.labelInterval(label)[0] == label:
+				symbols.setdefault(label)
+		sorted_symbols = sorted(symbols)
+
+		label_ranges = {}
+		for (state, label) in self.transitions:
+			if label not in label_ranges:
+				first, last = self.labelInterval(label)
+				label_ranges[label] = (bisect.bisect_left(sorted_symbols, first), bisect.bisect_right(sorted_symbols, last))
+		cuts = sorted({0, len(sorted_symbols)}.union(*label_ranges.values()))
+
+		states = {self.start_state}.union(self.accept_states, self.transitions.values())
+		states.update(state for (state, symbol) in self.transitions)
+		self.state_ids = {state: index for index, state in enumerate(sorted(states))}
+
+		# Segment i is sorted_symbols[cuts[i]:cuts[i + 1]]. Segments with the same
+		# destination row from every state (None for the trap) are one class
+		columns = [[None] * len(self.state_ids) for segment in range(len(cuts) - 1)]
+		for (state, label), next_state in self.transitions.items():
+			start, end = label_ranges[label]
+			for segment in range(bisect.bisect_left(cuts, start), bisect.bisect_left(cuts, end)):
+				columns[segment][self.state_ids[state]] = self.state_ids[next_state]
+		class_ids = {}
+		self.symbol_ids = {}
+		for segment, column in enumerate(columns):
+			class_id = class_ids.setdefault(tuple(column), len(class_ids))
+			for symbol in sorted_symbols[cuts[segment]:cuts[segment + 1]]:
+				self.symbol_ids[symbol] = class_id
+		self.row_width = max(len(class_ids), 1)
+
+		trap_offset = len(self.state_ids) * self.row_width
+		self.table = [trap_offset] * (trap_offset + self.row_width)
+		for column, class_id in class_ids.items():
+			for index, next_index in enumerate(column):
+				if next_index is not None:
+					self.table[index * self.row_width + class_id] = next_index * self.row_width
+
+		self.start_offset = self.state_ids[self.start_state] * self.row_width
+
+		self.accept_bitmap = bytearray(len(self.state_ids) // 8 + 1)
+		for state in self.accept_states:
+			index = self.state_ids[state]
+			self.accept_bitmap[index >> 3] |= 1 << (index & 7)
+
+		# int32 copy of the table and symbol intervals for simulate_many, built on first use
+		self.table_array = None
+		self.symbol_intervals = None
+
+		self.sink_rows = self.findSinks()
+
+		# Symbol id of each byte value (read as a Latin-1 code point), for simulating
+		# bytes without decoding them. 255 marks a byte that is not in the alphabet.
+		self.byte_table = None
+		if self.row_width < 255:
+			self.byte_table = bytes(self.symbol_ids.get(chr(byte), 255) for byte in range(256))
+
+	def minimize(self):
+		"""
+		Replaces the DFA with the equivalent DFA that has the fewest states,
+		found with Hopcroft's algorithm, and recompiles it. The minimal DFA's
+		states are numbered from 1, starting with its start state.
+		"""
+		num_classes = len(set(self.symbol_ids.values()))
+		num_rows = len(self.table) // self.row_width
+
+		# Work on table rows, which include the trap row for missing transitions,
+		# with one column per alphabet equivalence class
+		next_states = [[self.table[row * self.row_width + class_id] // self.row_width
+							for class_id in range(num_classes)] for row in range(num_rows)]
+		accepting = [self.isAccepting(row * self.row_width) for row in range(num_rows)]
+
+		state_map, representatives = self.hopcroft(next_states, accepting, self.start_offset // self.row_width)
+
+		self.num_states = len(representatives)
+		self.transitions = {}
+		class_labels = self.classLabels()
+		for number, representative in enumerate(representatives, start=1):
+			for class_id, labels in enumerate(class_labels):
+				for label in labels:
+					self.transitions[(number, label)] = state_map[next_states[representative][class_id]]
+		self.start_state = 1
+		self.accept_states = [number for number, representative in enumerate(representatives, start=1) if accepting[representative]]
+
+		self.compile()
+
+	@staticmethod
+	def hopcroft(next_states, accepting, start):
+		"""
+		Minimizes a complete DFA with Hopcroft's partition refinement algorithm,
+		in O(n*k*log n) time for n states and k symbols. pa2 minimizes the
+		DFAs it constructs with it too.
+
+		States are numbered from 0: next_states[q][c] is the state q moves to on
+		the c-th symbol, accepting[q] says whether q is an accept state, and start
+		is the start state. Returns a list mapping each state to its state in the
+		minimal DFA (numbered from 1 in breadth-first order from the start state,
+		or 0 if it is unreachable), and a list of one representative original
+		state for each minimal state.
+		"""
+		num_symbols = len(next_states[start])
+
+		# Only the states reachable from the start state are partitioned
+		reachable = [False] * len(next_states)
+		reachable[start] = True
+		stack = [start]
+		while stack:
+			for state in next_states[stack.pop()]:
+				if not reachable[state]:
+					reachable[state] = True
+					stack.append(state)
+
+		# previous[c][q] lists the states that move to state q on the c-th symbol
+		previous = [{} for symbol in range(num_symbols)]
+		for state, row in enumerate(next_states):
+			if reachable[state]:
+				for symbol, next_state in enumerate(row):
+					previous[symbol].setdefault(next_state, []).append(state)
+
+		# Start from the accept / non-accept partition
+		accept_block = {state for state in range(len(next_states)) if reachable[state] and accepting[state]}
+		reject_block = {state for state in range(len(next_states)) if reachable[state] and not accepting[state]}
+		blocks = [block for block in (accept_block, reject_block) if block]
+		block_of = [None] * len(next_states)
+		for index, block in enumerate(blocks):
+			for state in block:
+				block_of[state] = index
+
+		# (block, symbol) splitters still to be processed; only the smaller
+		# of the two starting blocks is needed
+		waiting = deque()
+		if len(blocks) == 2:
+			smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+			waiting.extend((smaller, symbol) for symbol in range(num_symbols))
+		in_waiting = set(waiting)
+
+		while waiting:
+			splitter = waiting.popleft()
+			in_waiting.discard(splitter)
+			splitter_block, symbol = splitter
+
+			# Group the states that move into the splitter block by their own block
+			moving_in = {}
+			for state in blocks[splitter_block]:
+				for previous_state in previous[symbol].get(state, ()):
+					moving_in.setdefault(block_of[previous_state], set()).add(previous_state)
+
+			for index, inside in moving_in.items():
+				if len(inside) == len(blocks[index]):
+					continue
+
+				# Split the block; the states moving in become a new block
+				blocks[index] -= inside
+				new_index = len(blocks)
+				blocks.append(inside)
+				for state in inside:
+					block_of[state] = new_index
+
+				for other_symbol in range(num_symbols):
+					if (index, other_symbol) in in_waiting or len(inside) <= len(blocks[index]):
+						splitter = (new_index, other_symbol)
+					else:
+						splitter = (index, other_symbol)
+					waiting.append(splitter)
+					in_waiting.add(splitter)
+
+		# Number the blocks breadth-first from the start state's block
+		block_numbers = [0] * len(blocks)
+		block_numbers[block_of[start]] = 1
+		representatives = [start]
+		for representative in representatives:
+			for next_state in next_states[representative]:
+				if not block_numbers[block_of[next_state]]:
+					representatives.append(next(iter(blocks[block_of[next_state]])))
+					block_numbers[block_of[next_state]] = len(representatives)
+
+		state_map = [block_numbers[block_of[state]] if reachable[state] else 0 for state in range(len(next_states))]
+		return state_map, representatives
+
+	def writeDFA(self, filename):
+		"""
+		Writes the DFA to the file whose name is filename, in the same format
+		that __init__ reads.
+		"""
+		if self.transitions is None:
+			self.decompile()
+
+		with open(filename, 'w') as dfa_file:
+			dfa_file.write(str(self.num_states) + "\n")
+			dfa_file.write(self.alphabet + "\n")
+
+			for ((state, symbol), next_state) in self.transitions.items():
+				dfa_file.write("%d \'%s\' %d\n" % (state, symbol, next_state))
+
+			dfa_file.write(str(self.start_state) + "\n")
+			dfa_file.write(" ".join(str(state) for state in self.accept_states))
+
+	def writeBinary(self, filename):
+		"""
+		Writes the compiled DFA to the file whose name is filename in the binary
+		DFA format: a BINARY_HEADER, the alphabet and the symbols (UTF-8), the
+		column of each symbol (uint32), the transition table (int32 row
+		offsets) and the accept bitmap. The table is aligned to 4 bytes so a
+		loader can use it in place from a memory map.
+		"""
+		alphabet = self.alphabet.encode('utf-8')
+		symbols = ''.join(self.symbol_ids).encode('utf-8')
+		columns = array('I', self.symbol_ids.values())
+		table = array('i', self.table)
+		if sys.byteorder != 'little':
+			columns.byteswap()
+			table.byteswap()
+
+		header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, self.num_states, self.row_width,
+									len(table) // self.row_width, self.start_offset, len(alphabet),
+									len(symbols), len(columns), len(self.accept_bitmap))
+		with open(filename, 'wb') as dfa_file:
+			dfa_file.write(header + alphabet + symbols)
+			dfa_file.write(bytes(-dfa_file.tell() % 4))
+			dfa_file.write(columns.tobytes())
+			dfa_file.write(table.tobytes())
+			dfa_file.write(self.accept_bitmap)
+
+	def loadBinary(self, filename):
+		"""
+		Initializes DFA from the binary DFA format file whose name is filename
+		(see writeBinary) without parsing or copying its transition table: the
+		file is memory mapped, and simulate reads the table and accept bitmap
+		straight from the mapped pages, which other processes loading the same
+		file share.
+
+		The transitions dictionary and accept states list are not rebuilt, and
+		are None until decompile is called.
+		"""
+		with open(filename, 'rb') as dfa_file:
+			self.mapped_file = mmap.mmap(dfa_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+		(magic, version, self.num_states, self.row_width, num_rows, self.start_offset, alphabet_size,
+			symbols_size, num_symbols, bitmap_size) = BINARY_HEADER.unpack_from(self.mapped_file)
+		if magic != BINARY_MAGIC or version != BINARY_VERSION:
+			raise ValueError(f"{filename} is not a version {BINARY_VERSION} binary DFA file")
+
+		buffer = memoryview(self.mapped_file)
+		position = BINARY_HEADER.size
+		self.alphabet = str(buffer[position:position + alphabet_size], 'utf-8')
+		position += alphabet_size
+		symbols = str(buffer[position:position + symbols_size], 'utf-8')
+		position += symbols_size
+		position += -position % 4
+
+		columns = array('I')
+		columns.frombytes(buffer[position:position + 4 * num_symbols])
+		position += 4 * num_symbols
+		if sys.byteorder != 'little':
+			columns.byteswap()
+		self.symbol_ids = dict(zip(symbols, columns))
+
+		# The table is used in place, so it has to be in this machine's byte order
+		table_size = 4 * num_rows * self.row_width
+		if sys.byteorder == 'little':
+			self.table = buffer[position:position + table_size].cast('i')
+		else:
+			table = array('i')
+			table.frombytes(buffer[position:position + table_size])
+			table.byteswap()
+			self.table = table
+		position += table_size
+		self.accept_bitmap = buffer[position:position + bitmap_size]
+
+		self.transitions = None
+		self.start_state = None
+		self.accept_states = None
+		self.state_ids = None
+		self.table_array = None
+		self.symbol_intervals = None
+		self.sink_rows = None # Found on first use, so loading stays instant (see sinkRows)
+		self.byte_table = None
+		if self.row_width < 255:
+			self.byte_table = bytes(self.symbol_ids.get(chr(byte), 255) for byte in range(256))
+
+	def decompile(self):
+		"""
+		Rebuilds the transitions dictionary, start state and accept states
+		from the transition table, numbering the states by table row from 1.
+		The trap row is only kept as a state if some transition leads to it.
+		"""
+		class_labels = self.classLabels()
+		num_rows = len(self.table) // self.row_width
+		trap_offset = (num_rows - 1) * self.row_width
+		if trap_offset not in self.table[:trap_offset] and trap_offset != self.start_offset:
+			num_rows -= 1
+
+		self.num_states = num_rows
+		self.transitions = {}
+		for row in range(num_rows):
+			for class_id, labels in enumerate(class_labels):
+				next_state = self.table[row * self.row_width + class_id]
+				for label in labels:
+					self.transitions[(row + 1, label)] = next_state // self.row_width + 1
+		self.start_state = self.start_offset // self.row_width + 1
+		self.accept_states = [row + 1 for row in range(num_rows) if self.isAccepting(row * self.row_width)]
+		self.state_ids = {row + 1: row for row in range(num_rows)}
+
+	def classLabels(self):
+		"""
+		Returns, for each class id, the list of transition labels for the
+		symbols of the class: an interval label such as 'a-z' for each run of
+		at least three alphabet symbols of the class that are consecutive in
+		sorted order, and the symbol itself for any other symbol.
+		"""
+		class_labels = [[] for class_id in range(self.row_width)]
+		alphabet = set(self.alphabet)
+		run = []
+		for symbol in sorted(self.symbol_ids) + [None]:
+			if run and (symbol not in alphabet or self.symbol_ids[symbol] != self.symbol_ids[run[0]]):
+				labels = class_labels[self.symbol_ids[run[0]]]
+				if len(run) >= 3:
+					labels.append(f"{run[0]}-{run[-1]}")
+				else:
+					labels.extend(run)
+				run = []
+			if symbol in alphabet:
+				run.append(symbol)
+			elif symbol is not None:
+				class_labels[self.symbol_ids[symbol]].append(symbol)
+		return class_labels
+
+	def isAccepting(self, offset):
+		"""
+		Returns True if the table row at offset belongs to an accept state.
+		"""
+		index = offset // self.row_width
+		return bool(self.accept_bitmap[index >> 3] >> (index & 7) & 1)
+
+	def findSinks(self):
+		"""
+		Returns a bytearray with a 1 for each table row that the rest of the
+		input cannot change the result from: dead rows, from which no accept
+		state can be reached (such as the trap row), and universal-accept rows,
+		from which only accept states can be reached. Both are found by
+		searching the table backwards, from the accept and from the other rows.
+		"""
+		row_width = self.row_width
+		num_rows = len(self.table) // row_width
+		previous_rows = [[] for row in range(num_rows)]
+		for row in range(num_rows):
+			for next_offset in set(self.table[row * row_width:(row + 1) * row_width]):
+				previous_rows[next_offset // row_width].append(row)
+		accepting = [self.isAccepting(row * row_width) for row in range(num_rows)]
+
+		sink_rows = bytearray(num_rows)
+		for is_accepting in (True, False):
+			# A row that cannot reach a row with this acceptance always has the other one
+			reaches = bytearray(num_rows)
+			stack = [row for row in range(num_rows) if accepting[row] == is_accepting]
+			for row in stack:
+				reaches[row] = 1
+			while stack:
+				for previous_row in previous_rows[stack.pop()]:
+					if not reaches[previous_row]:
+						reaches[previous_row] = 1
+						stack.append(previous_row)
+			for row in range(num_rows):
+				if not reaches[row]:
+					sink_rows[row] = 1
+
+		return sink_rows
+
+	def sinkRows(self):
+		"""
+		Returns the sink rows of findSinks, finding them on first use.
+		"""
+		if self.sink_rows is None:
+			self.sink_rows = self.findSinks()
+		return self.sink_rows
+
+	def inSink(self, offset):
+		"""
+		Returns True if the table row at offset is a sink row (see findSinks).
+		"""
+		return bool(self.sinkRows()[offset // self.row_width])
+
 	def simulate(self, string):
 		""" 
 		Simulates the DFA on input string.  Returns
 		True if string is in the language of the DFA,
 		and False if not.
 		"""
-		current_state = self.start_state
+		return self.isAccepting(self.advance(self.start_offset, string))
+
+	def advance(self, current_state, chunk):
+		"""
+		Reads chunk starting from the table row offset current_state and
+		returns the row offset of the state the DFA ends in. chunk is either a
+		str or a bytes-like object, whose bytes are each read as one symbol.
+		Raises a KeyError for a symbol that is not in the DFA's alphabet, unless
+		the DFA is already in a sink row (see findSinks) when it reads it.
+
+		chunk is read in blocks, the first sink_check_interval symbols long and
+		each twice as long as the last, and reading stops early once the DFA is
+		in a sink row (see findSinks), so the rest of chunk is not checked either.
+		"""
+		table = self.table
+
+		if not isinstance(chunk, str):
+			if self.byte_table is None:
+				chunk = bytes(chunk).decode('latin-1')
+			else:
+				symbol_ids = bytes(chunk).translate(self.byte_table)
+				unknown = symbol_ids.find(255)
+				end = len(symbol_ids) if unknown == -1 else unknown
+
+				block_start = 0
+				block_size = DFA.sink_check_interval
+				while True:
+					block_end = min(block_start + block_size, end)
+					for symbol_id in symbol_ids[block_start:block_end]:
+						current_state = table[current_state + symbol_id]
+					if block_end == end or self.inSink(current_state):
+						break
+					block_start = block_end
+					block_size = min(2 * block_size, DFA.max_sink_check_interval)
+
+				if unknown != -1 and not self.inSink(current_state):
+					raise KeyError(chr(chunk[unknown]))
+				return current_state
+
+		# Map each read in symbol to its id, then use the transition table to move
+		# from current_state's row to the next state's row
+		symbol_ids = self.symbol_ids
+		block_start = 0
+		block_size = DFA.sink_check_interval
+		while True:
+			block_end = block_start + block_size
+			try:
+				for symbol_id in map(symbol_ids.__getitem__, chunk[block_start:block_end]):
+					current_state = table[current_state + symbol_id]
+			except KeyError:
+				# As for bytes, an unknown symbol after the DFA is in a sink row is not an error
+				if not self.inSink(current_state):
+					raise
+				return current_state
+			if block_end >= len(chunk) or self.inSink(current_state):
+				return current_state
+			block_start = block_end
+			block_size = min(2 * block_size, DFA.max_sink_check_interval)
+
+	def simulate_stream(self, source, chunk_size=1 << 16):
+		"""
+		Simulates the DFA on an input that does not have to be in memory all at
+		once. Returns True if the whole input is in the language of the DFA,
+		and False if not.
+
+		source may be a binary (or text) file object, a socket, an mmap or other
+		bytes-like buffer, or any iterable of str or bytes chunks. The current
+		state is carried across chunk boundaries, and (for alphabets of fewer
+		than 255 symbols) bytes are never decoded into Python strings. No more
+		of source is read once the DFA is in a sink row (see findSinks).
+		"""
+		current_state = self.start_offset
+		for chunk in self.chunks(source, chunk_size):
+			current_state = self.advance(current_state, chunk)
+			if self.inSink(current_state):
+				break
+
+		return self.isAccepting(current_state)
+
+	def chunks(self, source, chunk_size):
+		"""
+		Yields the input of source (see simulate_stream) in chunks of at most
+		chunk_size symbols. Buffers such as an mmap are sliced through a
+		memoryview, so only one chunk is copied at a time.
+		"""
+		if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+			buffer = memoryview(source).cast('B')
+			for start in range(0, len(buffer), chunk_size):
+				yield buffer[start:start + chunk_size]
+		elif isinstance(source, str):
+			yield source
+		elif hasattr(source, 'read'):
+			chunk = source.read(chunk_size)
+			while chunk:
+				yield chunk
+				chunk = source.read(chunk_size)
+		elif hasattr(source, 'recv'):
+			chunk = source.recv(chunk_size)
+			while chunk:
+				yield chunk
+				chunk = source.recv(chunk_size)
+		else:
+			yield from source
+
+
+	def simulate_parallel(self, source, workers=None, min_chunk_size=1 << 20):
+		"""
+		Simulates the DFA on one large input across a pool of worker processes.
+		Returns True if the whole input is in the language of the DFA, and
+		False if not.
+
+		source is the name of a file, which each worker memory maps, or a
+		bytes-like object, which is copied once into shared memory. As in
+		simulate_stream, each byte is read as one symbol. The input is split
+		into up to workers chunks of at least min_chunk_size bytes. A run of
+		the DFA over a chunk is a map from the state it starts in to the state
+		it ends in, so while the first chunk is run from the start state, the
+		others are run speculatively from every state (see runChunk), and
+		their maps are composed in order at the end, stopping at the first
+		chunk that ends in a sink row (see findSinks), after which the workers
+		still running are told to stop. Smaller inputs are simulated in this
+		process with simulate_stream. As in advance, a byte that is not in the
+		DFA's alphabet raises a KeyError unless the DFA is in a sink row by then.
+		"""
+		if isinstance(source, str):
+			size = os.path.getsize(source)
+		else:
+			source = memoryview(source).cast('B')
+			size = len(source)
+
+		num_chunks = max(1, min(workers or os.cpu_count() or 1, size // max(min_chunk_size, 1)))
+		if num_chunks == 1:
+			if isinstance(source, str):
+				with open(source, 'rb') as input_file:
+					return self.simulate_stream(input_file)
+			return self.simulate_stream(source)
+
+		shared_input = None
+		if isinstance(source, str):
+			input_name = ('file', source)
+		else:
+			shared_input = shared_memory.SharedMemory(create=True, size=size)
+			shared_input.buf[:size] = source
+			input_name = ('shared', shared_input.name)
+
+		bounds = [size * chunk // num_chunks for chunk in range(num_chunks + 1)]
+		table = self.table.tobytes() if isinstance(self.table, memoryview) else array('i', self.table).tobytes()
+		stop = Event()
+		try:
+			# Leaving the with block waits for every worker to exit, so the shared
+			# memory is only unlinked once no worker can still attach to it
+			with ProcessPoolExecutor(num_chunks, initializer=DFA.initWorker,
+									 initargs=(table, self.row_width, self.symbol_ids, self.byte_table,
+											   self.sinkRows(), input_name, stop)) as executor:
+				first_chunk = executor.submit(DFA.runChunk, [self.start_offset], bounds[0], bounds[1])
+				chunks = [executor.submit(DFA.runChunk, None, bounds[chunk], bounds[chunk + 1])
+						  for chunk in range(1, num_chunks)]
+
+				slots, states, unknown = first_chunk.result()
+				current_state = states[0]
+				for chunk in chunks:
+					if current_state is None or self.inSink(current_state):
+						stop.set()
+						break
+					slots, states, unknown = chunk.result()
+					current_state = states[slots[current_state // self.row_width]]
+		finally:
+			if shared_input is not None:
+				shared_input.close()
+				shared_input.unlink()
+
+		if current_state is None:
+			raise KeyError(unknown)
+		return self.isAccepting(current_state)
+
+	# Transition table, symbols and input of a simulate_parallel worker process
+	worker = None
+
+	@staticmethod
+	def initWorker(table, row_width, symbol_ids, byte_table, sink_rows, input_name, stop):
+		"""
+		Sets up a simulate_parallel worker process: loads the transition table
+		from its int32 bytes, and memory maps the input file or attaches to the
+		input's shared memory, depending on input_name. stop is the event that
+		tells the worker's runs to stop early.
+		"""
+		kind, name = input_name
+		if kind == 'file':
+			with open(name, 'rb') as input_file:
+				input_buffer = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+		elif sys.version_info >= (3, 13):
+			input_buffer = shared_memory.SharedMemory(name=name, track=False)
+		else:
+			# Workers share the resource tracker of the process that created the
+			# shared memory, so attaching re-registers the same entry, which the
+			# creator's unlink removes (unregistering it here would remove it early)
+			input_buffer = shared_memory.SharedMemory(name=name)
+
+		table_array = array('i')
+		table_array.frombytes(table)
+		table = table_array.tolist()
+
+		sinks = frozenset(row * row_width for row, is_sink in enumerate(sink_rows) if is_sink)
+
+		DFA.worker = {'table': table, 'row_width': row_width, 'sinks': sinks, 'symbol_ids': symbol_ids,
+					  'byte_table': byte_table, 'input_buffer': input_buffer, 'stop': stop}
+
+	@staticmethod
+	def runChunk(start_states, start, end, block_size=1 << 20, merge_every=64):
+		"""
+		Runs the DFA of a simulate_parallel worker over the input bytes from
+		start to end, from each of the row offsets start_states at once (every
+		state if it is None). Returns (slots, states, unknown): the run from
+		start_states[i] ends in the row offset states[slots[i]]. If the input
+		has a symbol that is not in the alphabet, unknown is the first one and
+		the runs that are not in a sink row when they reach it end in None.
+
+		Runs that reach the same state stay together from then on, so every
+		merge_every symbols runs in the same state are merged into one slot,
+		and runs in a sink state are no longer advanced. Most DFAs soon bring
+		every run into one state or a sink, after which the rest of the chunk
+		costs the same as a single run, or nothing once every run is in a sink.
+		The runs stop between blocks once the worker's stop event is set.
+		"""
+		worker = DFA.worker
+		table = worker['table']
+		sinks = worker['sinks']
+		symbol_ids = worker['symbol_ids']
+		byte_table = worker['byte_table']
+		input_buffer = worker['input_buffer']
+		if not isinstance(input_buffer, mmap.mmap):
+			input_buffer = input_buffer.buf
+
+		if start_states is None:
+			start_states = range(0, len(table), worker['row_width'])
+		states = list(start_states)
+		slots = list(range(len(states)))
+
+		for block_start in range(start, end, block_size):
+			if worker['stop'].is_set():
+				break
+
+			block = bytes(input_buffer[block_start:min(block_start + block_size, end)])
+			unknown = None
+			if byte_table is None:
+				symbols = block.decode('latin-1')
+				try:
+					block_ids = [symbol_ids[symbol] for symbol in symbols]
+				except KeyError:
+					position = next(index for index, symbol in enumerate(symbols) if symbol not in symbol_ids)
+					unknown = symbols[position]
+					block_ids = [symbol_ids[symbol] for symbol in symbols[:position]]
+			else:
+				block_ids = block.translate(byte_table)
+				position = block_ids.find(255)
+				if position != -1:
+					unknown = chr(block[position])
+					block_ids = block_ids[:position]
+
+			index = 0
+			while index < len(block_ids):
+				# Merge runs in the same state, and order the states so the ones that are not sinks come first
+				distinct_states = sorted(set(states), key=sinks.__contains__)
+				if distinct_states != states:
+					new_slots = {state: slot for slot, state in enumerate(distinct_states)}
+					slots = [new_slots[states[slot]] for slot in slots]
+					states = distinct_states
+				num_moving = next((slot for slot, state in enumerate(states) if state in sinks), len(states))
+				if num_moving == 0:
+					return slots, states, None
+
+				if num_moving == 1:
+					current_state = states[0]
+					for symbol_id in block_ids[index:]:
+						current_state = table[current_state + symbol_id]
+					states[0] = current_state
+				if num_moving <= 1:
+					break
+
+				# Advance the remaining runs in lockstep
+				moving_states = states[:num_moving]
+				for symbol_id in block_ids[index:index + merge_every]:
+					moving_states = [table[state + symbol_id] for state in moving_states]
+				states[:num_moving] = moving_states
+				index += merge_every
+
+			if unknown is not None:
+				return slots, [state if state in sinks else None for state in states], unknown
+
+		return slots, states, None
+
+	def simulate_many(self, strings):
+		"""
+		Simulates the DFA on every string in strings at once. Returns a NumPy
+		boolean array whose i-th entry is True if the i-th string is in the
+		language of the DFA, and False if not.
+
+		All strings advance one symbol per step in lockstep, as a single gather
+		on an int32 copy of the transition table. Strings are sorted longest
+		first, so the strings still being read at step i are always a prefix of
+		the sorted order and shorter strings simply stop advancing. Every
+		sink_check_interval steps, the strings that have ended or are in a sink
+		row (see findSinks) are dropped. As with simulate, a KeyError is raised
+		for a symbol that is not in the DFA's alphabet unless the string's run
+		is already in a sink row when it reads it. Without NumPy installed,
+		returns a list of simulate results instead.
+		"""
+		strings = list(strings)
+		if np is None:
+			return [self.simulate(string) for string in strings]
+
+		num_strings = len(strings)
+		lengths = np.fromiter(map(len, strings), dtype=np.int64, count=num_strings)
+		max_length = int(lengths.max()) if num_strings else 0
+
+		# Every string's symbol ids, back to back, and where each string starts
+		text = ''.join(strings)
+		symbol_ids = self.toSymbolIds(text)
+		has_unknown = bool(len(symbol_ids)) and int(symbol_ids.min()) < 0
+		offsets = np.cumsum(lengths) - lengths
+
+		if self.table_array is None:
+			self.table_array = np.asarray(self.table, dtype=np.int32)
+		table = self.table_array
+		sink_rows = np.frombuffer(self.sinkRows(), dtype=np.uint8)
+
+		# The runs still being read: each string's index, start offset, length
+		# and state, longest string first
+		run_indices = np.argsort(-lengths, kind='stable')
+		run_offsets = offsets[run_indices]
+		run_lengths = lengths[run_indices]
+		run_states = np.full(num_strings, self.start_offset, dtype=np.int32)
+		negated_lengths = -run_lengths
+
+		states = np.empty(num_strings, dtype=np.int32)
+		for step in range(max_length):
+			if step % DFA.sink_check_interval == 0:
+				states[run_indices] = run_states
+				keep = (run_lengths > step) & (sink_rows[run_states // self.row_width] == 0)
+				run_indices, run_offsets, run_lengths, run_states = (
+					run_indices[keep], run_offsets[keep], run_lengths[keep], run_states[keep])
+				negated_lengths = -run_lengths
+				if not len(run_indices):
+					break
+
+			# The runs longer than step are a prefix of the runs
+			count = np.searchsorted(negated_lengths, -step, side='left')
+			next_ids = symbol_ids[run_offsets[:count] + step]
+			if has_unknown:
+				unknown = np.flatnonzero(next_ids < 0)
+				if len(unknown):
+					outside_sinks = unknown[sink_rows[run_states[unknown] // self.row_width] == 0]
+					if len(outside_sinks):
+						raise KeyError(text[run_offsets[outside_sinks[0]] + step])
+					# The other runs are in sink rows, which only lead to sink
+					# rows of the same acceptance, so any column will do
+					next_ids[unknown] = 0
+			run_states[:count] = table[run_states[:count] + next_ids]
+		states[run_indices] = run_states
+
+		accept_flags = np.unpackbits(np.frombuffer(self.accept_bitmap, dtype=np.uint8), bitorder='little')
+		return accept_flags[states // self.row_width].astype(bool)
+
+	def toSymbolIds(self, string):
+		"""
+		Returns a NumPy int32 array of the symbol id of each symbol in string,
+		with -1 for a symbol that is not in the DFA's alphabet.
+		"""
+		code_points = np.frombuffer(string.encode('utf-32-le'), dtype=np.uint32)
+		if not len(code_points):
+			return np.zeros(0, dtype=np.int32)
+
+		# Binary search for each code point's interval (see symbolIntervals)
+		if self.symbol_intervals is None:
+			self.symbol_intervals = self.symbolIntervals()
+		starts, interval_ids = self.symbol_intervals
+		return interval_ids[np.searchsorted(starts, code_points, side='right') - 1]
+
+	def symbolIntervals(self):
+		"""
+		Returns the alphabet as sorted, non-overlapping code point intervals:
+		NumPy arrays of the first code point of each interval and of its symbol
+		id, or -1 for the code points between the alphabet's symbols. Runs of
+		consecutive code points with the same symbol id are one interval, so a
+		class such as a-z costs one entry however large the alphabet is.
+		"""
+		starts = []
+		interval_ids = []
+		end = 0
+		for symbol, symbol_id in sorted(self.symbol_ids.items()):
+			code_point = ord(symbol)
+			if code_point == end and interval_ids and interval_ids[-1] == symbol_id:
+				end += 1
+				continue
+			if code_point != end:
+				starts.append(end)
+				interval_ids.append(-1)
+			starts.append(code_point)
+			interval_ids.append(symbol_id)
+			end = code_point + 1
+		starts.append(end)
+		interval_ids.append(-1)
+
+		return np.array(starts, dtype=np.int64), np.array(interval_ids, dtype=np.int32)
+
+if __name__ == "__main__":
+	# Minimizes a DFA file, and/or converts it to the binary DFA format:
+	# python pa1.py [--binary] [--no-minimize] dfa_filename output_filename
+	parser = argparse.ArgumentParser(description="Minimize a DFA file or convert it to the binary DFA format.")
+	parser.add_argument("dfa_filename")
+	parser.add_argument("output_filename")
+	parser.add_argument("--binary", action="store_true", help="write the binary DFA format")
+	parser.add_argument("--no-minimize", action="store_true", help="keep the DFA's states as they are")
+	arguments = parser.parse_args()
 
-		# For each read in symbol, use the transitions dictionary to transition from current_state to the next state
-		# Then, reassign current_state
-		for symbol in string:
-			current_state = self.transitions[(current_state, symbol)]
+	dfa = DFA(arguments.dfa_filename)
+	if not arguments.no_minimize:
+		dfa.minimize()
 
-		return current_state in (self.accept_states)
+	if arguments.binary:
+		dfa.writeBinary(arguments.output_filename)
+	else:
+		dfa.writeDFA(arguments.output_filename)
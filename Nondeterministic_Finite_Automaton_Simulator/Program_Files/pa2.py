@@ -9,9 +9,29 @@
 # Note: a majority of syncs were done by Andres, individual 
 # and group contributions are listed under each function/section.
 
+import bisect
+import time
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+
+# pa1's DFA simulator, in this program's directory, minimizes the DFA
+import pa1
+
+class StateLimitExceeded(Exception):
+	pass
+
 class NFA:
 	""" Simulates an NFA """
 
+	# Set collect_stats to True to record statistics on each NFA's conversion to a DFA
+	# (see newStats) in its stats dictionary. stats_hook, if set, is called with the
+	# NFA and its stats once toDFA is done, e.g. to forward them to a metrics system.
+	collect_stats = False
+	stats_hook = None
+	stats = None
+	# Smallest frontier whose moves a parallel subset construction hands to its workers
+	min_parallel_frontier = 64
+
 	def __init__(self, nfa_filename):
 		"""
 		Contributor(s): Patrick, Andres
@@ -28,7 +48,7 @@ class NFA:
 			self.start_state = ''
 			self.accept_states = []
 
-			# Defines transition for NFA: (state, symbol in alphabet or 'e') --> {destination states}
+			# Defines transition for NFA: (state, symbol in alphabet, interval label or 'e') --> {destination states}
 			for line in nfa_file: 
 				token_list = line.rstrip('\n').split(" ")
 
@@ -37,7 +57,7 @@ class NFA:
 					current_state  = int(token_list[0])
 					transition = token_list[1].strip("\'")
 					destination_state = int(token_list[2])
-					
+
 					if (current_state, transition) not in self.transitions.keys():
 						self.transitions[(current_state, transition)] = {destination_state}
 					else: 
@@ -54,7 +74,41 @@ class NFA:
 				
 		nfa_file.close()
 
-	def toDFA(self, dfa_filename):
+		# Start subset, per-symbol moves and accept bitmask for simulate, built on first use
+		self.simulation_masks = None
+
+	@staticmethod
+	def labelInterval(label):
+		"""
+		Contributor(s): Patrick
+		Returns the first and last symbol of the symbols that a transition label
+		stands for. An interval label such as 'a-z' stands for every alphabet
+		symbol from its first to its last character, and any other label
+		(including 'e') for itself alone.
+		"""
+
+		if len(label) == 3 and label[1] == '-':
+			return label[0], label[2]
+		return label, label
+
+	@classmethod
+	def fromTransitions(cls, num_states, alphabet, transitions, start_state, accept_states):
+		"""
+		Contributor(s): Patrick
+		Initializes NFA from memory, without reading a file, by passing in all
+		necessary pieces.
+		"""
+
+		nfa = cls.__new__(cls)
+		nfa.num_states = num_states
+		nfa.alphabet = alphabet
+		nfa.transitions = transitions
+		nfa.start_state = start_state
+		nfa.accept_states = accept_states
+		nfa.simulation_masks = None
+		return nfa
+
+	def toDFA(self, dfa_filename, minimize=False, max_states=None, workers=None):
 		"""
 		Contributor(s): Andres, Patrick
 		Converts the "self" NFA into an equivalent DFA
@@ -67,135 +121,576 @@ class NFA:
 		This function should not read in the NFA file again.  It should
 		create the DFA from the internal representation of the NFA that you 
 		created in __init__.
+
+		If minimize is True, the DFA is minimized before it is written. If the DFA
+		would have more than max_states states, StateLimitExceeded is raised.
+		The subset construction runs on workers processes (see subsetConstruction).
 		"""
 
+		if type(self).collect_stats:
+			self.stats = self.newStats()
+			self.recordSizes(self.stats)
+
 		# Converts the "self" NFA into an equivalent DFA 
-		dfa_construction = self.constructDFA()
+		start = time.perf_counter()
+		dfa_construction = self.constructDFA(minimize, max_states, workers)
+		constructed = time.perf_counter()
 		
 		# Writes the constructed DFA to an external file based on the input filename
 		self.writeDFA(dfa_filename, dfa_construction)
+
+		if self.stats is not None:
+			self.stats['dfa_states'] = len(dfa_construction[0])
+			self.stats['seconds']['constructDFA'] = constructed - start
+			self.stats['seconds']['write'] = time.perf_counter() - constructed
+			if type(self).stats_hook is not None:
+				type(self).stats_hook(self, self.stats)
+
+	@staticmethod
+	def newStats():
+		"""
+		Contributor(s): Patrick
+		Returns a new statistics dictionary, with the sizes of the NFA (see
+		recordSizes), the number of DFA states, the number of epsilon closures
+		computed, the number of times the subset construction found a subset it
+		already had, and the wall time in seconds of each phase.
+		"""
+
+		return {'nfa_states': 0, 'nfa_epsilon_edges': 0, 'nfa_symbol_edges': 0, 'dfa_states': 0,
+				'closure_calls': 0, 'subset_hits': 0, 'seconds': {}}
+
+	def recordSizes(self, stats):
+		"""
+		Contributor(s): Patrick
+		Records the number of states of the NFA and its number of epsilon and
+		symbol transitions in stats.
+		"""
+
+		stats['nfa_states'] = self.num_states
+		for (state, symbol), destinations in self.transitions.items():
+			if symbol == 'e':
+				stats['nfa_epsilon_edges'] += len(destinations)
+			else:
+				stats['nfa_symbol_edges'] += len(destinations)
 		
 
-	def constructDFA(self):
+	def constructDFA(self, minimize=False, max_states=None, workers=None):
 		"""
 		Contributor(s): Patrick, Andres
 		Convert the internal representation of the NFA to an equivalent DFA. 
 		Returns a tuple construction of the DFA - the states, transitions, 
 		start state and accept states. Also, converts sets of states into 
 		single number states to be consistent with PA1 DFA definitions.
+		If minimize is True, equivalent DFA states are merged (see minimizeDFA).
+		Raises StateLimitExceeded if the DFA would have more than max_states states.
+		The subset construction runs on workers processes (see subsetConstruction),
+		on the reduced NFA (see reduce).
 		"""
-		
-		# DFA internal representation
-		dfa_start_state = self.epsilon({self.start_state})
-		dfa_accept_states = []
+
+		reduced_nfa = self.reduce()
+		reduced_nfa.stats = self.stats
+		subsets, successors, symbol_classes = reduced_nfa.subsetConstruction(max_states, workers)
+
+		# DFA states are numbered from 1 in the order their subsets were found,
+		# and each symbol moves as its alphabet equivalence class does
+		dfa_states = list(range(1, len(subsets) + 1))
 		dfa_transitions = {}
-		dfa_states = [dfa_start_state]
-		new_state_queue = [dfa_start_state]
-		
-		# While there are newly found states in new_state_queue, 
-		# continue to find transitions
-		while new_state_queue:
-			for symbol in self.alphabet:
-				current_state = frozenset(new_state_queue[0])
-				new_dfa_state = self.getDFADestination(current_state, symbol)
-				dfa_transitions[(current_state, symbol)] = new_dfa_state
-				if new_dfa_state not in dfa_states:
-					dfa_states.append(new_dfa_state)
-					new_state_queue.append(new_dfa_state)
-
-			new_state_queue.pop(0)
+		for number, row in enumerate(successors, start=1):
+			for symbol, class_id in symbol_classes.items():
+				dfa_transitions[(number, symbol)] = row[class_id] + 1
 
 		# All DFA accept states are states that contain an NFA accept state
-		dfa_accept_states = [state for state in dfa_states for accept_state in self.accept_states if accept_state in state]					
-		
-		# Changes DFA definition components to have unique single numbers instead of sets of states
-		setStatesToNumber = self.getSetStatesToNumber(dfa_states)
-		dfa_states = self.toListOfNumbers(dfa_states, setStatesToNumber)
-		dfa_accept_states = self.toListOfNumbers(dfa_accept_states, setStatesToNumber)
-		dfa_transitions = self.toTransitionsOfNumbers(dfa_transitions, setStatesToNumber)
-		
-		return (dfa_states, dfa_transitions, setStatesToNumber[dfa_start_state], dfa_accept_states)
-		
-	def epsilon(self, states=set()):
+		dfa_accept_states = [number for number, subset in enumerate(subsets, start=1)
+								for accept_state in reduced_nfa.accept_states if subset >> accept_state & 1]
+
+		dfa_construction = (dfa_states, dfa_transitions, 1, dfa_accept_states)
+
+		if minimize:
+			return self.minimizeDFA(dfa_construction)
+		return dfa_construction
+
+	def simulate(self, string):
 		"""
-		Contributor(s): Andres, Patrick 
-		Defines the epsilon function - takes in a set of states and 
-		returns the set of states that contains the "from" and "to" 
-		state in an epsilon transition. It also continuously checks 
-		for further epsilon transitions.
+		Contributor(s): Patrick
+		Simulates the NFA directly on input string, without converting it to a
+		DFA. Returns True if string is in the language of the NFA, and False if not.
+
+		The set of active NFA states is kept as a bitmask and advanced one symbol
+		at a time with the precomputed epsilon closures (see moveMasks), so memory
+		stays proportional to the number of NFA states, however large the
+		equivalent DFA would be. Once no NFA state is active (the empty subset,
+		the equivalent DFA's dead state), the string is rejected without reading
+		the rest of it.
 		"""
 
-		new_state = states
-		state_sets_list = [states]
+		if self.simulation_masks is None:
+			closures = self.closureMasks()
+			symbol_classes, class_moves = self.symbolClasses(self.moveMasks(closures))
+			accept_mask = 0
+			for state in self.accept_states:
+				accept_mask |= 1 << state
+			symbol_moves = {symbol: class_moves[class_id] for symbol, class_id in symbol_classes.items()}
+			self.simulation_masks = (closures[self.start_state], symbol_moves, accept_mask)
+		start_subset, symbol_moves, accept_mask = self.simulation_masks
 
-		# While there are epsilon transitions in at least 1 state in the set of states, 
-		# apply the epsilon function to that state in the set of states
-		while state_sets_list:
-			for state in state_sets_list[0]:
-				if(state, 'e') in self.transitions.keys():
-					new_state = new_state.union(self.transitions[state, 'e'])
-					# Stores the new set of states from the epsilon transition to apply the epsilon function on this new set
-					state_sets_list.append(self.transitions[(state, 'e')])
-			state_sets_list.pop(0)
+		current_subset = start_subset
+		for moves_on_symbol in map(symbol_moves.__getitem__, string):
+			current_subset = self.moveSubset(current_subset, moves_on_symbol)
+			if not current_subset:
+				return False
 
-		return frozenset(new_state)
+		return bool(current_subset & accept_mask)
 
-	def getDFADestination(self, current_state, symbol):
+	def simulate_many(self, strings):
 		"""
-		Contributor(s): Patrick, Andres
-		Based on the input set of states "current_state", returns an output state that
-		is the union of destination states states that come from the transitions from 
-		each state in current_state via the input symbol.
+		Contributor(s): Patrick
+		Returns, for each string in strings, whether it is in the language of
+		the NFA (see simulate), as a list.
 		"""
 
-		new_state = set()
-		for element in current_state:
-			if (element,symbol) in self.transitions.keys():
-				new_state = new_state.union(self.epsilon(self.transitions[(element, symbol)]))
-		return frozenset(new_state)
-	
-	def toTransitionsOfNumbers(self, dict_of_transitions = dict(), setStatesToNumber = dict()):
+		return [self.simulate(string) for string in strings]
+
+	def subsetConstruction(self, max_states=None, workers=None):
 		"""
-		Contributor(s): Andres
-		Given a dictionary of sets of states that map to single numbered states,
-		convert the current state and next state in a dictionary of "(current state, symbol) --> next state"
-		transitions from sets of states to single numbered states.
+		Contributor(s): Patrick
+		Runs the subset construction on the NFA, with sets of NFA states kept
+		as int bitmasks (bit s is set for NFA state s). Returns the list of
+		reachable subsets, in the breadth-first order they were found starting
+		from the start state's epsilon closure, for each subset the list of the
+		indices of its successor subsets, one per alphabet equivalence class,
+		and the dictionary from each alphabet symbol to its class (see
+		symbolClasses).
 
-		Returns a dictionary of (current state, symbol) --> next state transitions with all the states
-		as numbers.
+		Each subset is looked up in a dictionary from subset to index, and the
+		epsilon closures are computed once per NFA state up front. Raises
+		StateLimitExceeded as soon as more than max_states subsets are found.
+
+		Subsets are expanded one breadth-first level (frontier) at a time. If
+		workers is more than 1, the moves of frontiers of at least
+		min_parallel_frontier subsets are computed on a pool of that many
+		processes (see parallelSuccessors), started for the first such frontier
+		and shut down when the construction ends, and the results
+		are numbered in frontier order, so the DFA is the same as with one process.
+		The pool is off by default: moving a subset costs little next to
+		pickling it to a worker and back, so it is slower than one process on
+		the inputs measured so far (see the README).
 		"""
-		
-		dfa_transition_numbers = {}
-		for (state_symbol_tuple, next_state) in dict_of_transitions.items():
-			current_state = state_symbol_tuple[0]
-			symbol = state_symbol_tuple[1]
-			# Populate new dictionary of transitions with current_state and next_state as single numbered states
-			dfa_transition_numbers[(setStatesToNumber[current_state], symbol)] = setStatesToNumber[next_state]
-		return dfa_transition_numbers
 
-	def toListOfNumbers(self, list_of_states = list(), setStatesToNumber = dict()):
+		closures = self.closureMasks()
+		symbol_classes, class_moves = self.symbolClasses(self.moveMasks(closures))
+
+		start_subset = closures[self.start_state]
+		subsets = [start_subset]
+		subset_indices = {start_subset: 0}
+		successors = []
+		frontier = [start_subset]
+
+		# The worker pool is only started once a frontier is large enough to use it
+		with ExitStack() as pool:
+			executor = None
+
+			# While there are newly found subsets, find their transitions
+			while frontier:
+				if workers is None or workers <= 1 or len(frontier) < self.min_parallel_frontier:
+					next_subset_rows = ([self.moveSubset(subset, moves_on_symbol) for moves_on_symbol in class_moves]
+										for subset in frontier)
+				else:
+					if executor is None:
+						executor = pool.enter_context(ProcessPoolExecutor(workers, initializer=NFA.initWorker, initargs=(class_moves,)))
+					next_subset_rows = self.parallelSuccessors(executor, frontier)
+
+				new_frontier = []
+				for next_subsets in next_subset_rows:
+					row = []
+					for next_subset in next_subsets:
+						next_index = subset_indices.get(next_subset)
+						if next_index is None:
+							if max_states is not None and len(subsets) >= max_states:
+								raise StateLimitExceeded(f"DFA has more than {max_states} states")
+							next_index = subset_indices[next_subset] = len(subsets)
+							subsets.append(next_subset)
+							new_frontier.append(next_subset)
+						row.append(next_index)
+					successors.append(row)
+				frontier = new_frontier
+
+		if self.stats is not None:
+			self.stats['subset_hits'] += len(subsets) * len(class_moves) - (len(subsets) - 1)
+		return subsets, successors, symbol_classes
+
+	def symbolClasses(self, moves):
 		"""
-		Contributor(s): Andres
-		Given a dictionary of sets of states that map to singled numbered states, 
-		convert a list of sets of states into a list of single numbered states.
+		Contributor(s): Patrick
+		Partitions the alphabet into equivalence classes: symbols on which
+		every NFA state reaches the same states, given the moves of moveMasks,
+		so that no subset can tell them apart. Returns the dictionary from each
+		alphabet symbol to its class id, numbered in order of the classes'
+		first symbols, and the moves of each class.
 
-		Returns a list of single numbered states.
+		Transition labels are not expanded into their symbols. The sorted
+		alphabet is cut at the first and last symbol of every label (see
+		labelInterval), so each label covers whole segments, and the segments
+		are grouped into classes by their moves.
 		"""
-		
-		for index in range(len(list_of_states)):
-			list_of_states[index] = setStatesToNumber[list_of_states[index]]
-		
-		return list_of_states
-		
-	def getSetStatesToNumber(self, dfa_states=frozenset()):
+
+		sorted_alphabet = sorted(set(self.alphabet))
+		label_ranges = {}
+		for label in moves:
+			first, last = self.labelInterval(label)
+			label_ranges[label] = (bisect.bisect_left(sorted_alphabet, first), bisect.bisect_right(sorted_alphabet, last))
+		cuts = sorted({0, len(sorted_alphabet)}.union(*label_ranges.values()))
+
+		# Segment i is sorted_alphabet[cuts[i]:cuts[i + 1]]
+		segment_moves = [{} for segment in range(len(cuts) - 1)]
+		for label, (start, end) in label_ranges.items():
+			for segment in range(bisect.bisect_left(cuts, start), bisect.bisect_left(cuts, end)):
+				moves_on_segment = segment_moves[segment]
+				for state, mask in moves[label].items():
+					moves_on_segment[state] = moves_on_segment.get(state, 0) | mask
+
+		class_ids = {}
+		class_moves = []
+		segment_classes = [None] * len(segment_moves)
+		symbol_classes = {}
+		for symbol in dict.fromkeys(self.alphabet):
+			segment = bisect.bisect_right(cuts, bisect.bisect_left(sorted_alphabet, symbol)) - 1
+			if segment_classes[segment] is None:
+				signature = frozenset(segment_moves[segment].items())
+				if signature not in class_ids:
+					class_ids[signature] = len(class_moves)
+					class_moves.append(segment_moves[segment])
+				segment_classes[segment] = class_ids[signature]
+			symbol_classes[symbol] = segment_classes[segment]
+
+		return symbol_classes, class_moves
+
+	def closureMasks(self):
 		"""
-		Contributor(s): Andres
-		Creates a mapping of set of states to single numbered states.
+		Contributor(s): Patrick
+		Returns a dictionary that maps each NFA state to the bitmask of its
+		epsilon closure: the state itself and every state reachable from it
+		through epsilon transitions alone.
+		"""
+
+		epsilon_moves = {state: destinations for (state, symbol), destinations in self.transitions.items() if symbol == 'e'}
 
-		Returns a dictionary of these mappings.
+		# Every state of a component has the same closure: the component's states together with the
+		# closures of the components they have epsilon transitions to, which are always found first
+		closures = {}
+		components = self.epsilonComponents()
+		for component in components:
+			closure = 0
+			for state in component:
+				closure |= 1 << state
+				for destination in epsilon_moves.get(state, ()):
+					closure |= closures.get(destination, 0)
+			for state in component:
+				closures[state] = closure
+
+		if self.stats is not None:
+			self.stats['closure_calls'] += len(components)
+		return closures
+
+	def epsilonComponents(self):
 		"""
+		Contributor(s): Patrick
+		Returns the strongly connected components of the NFA's epsilon transitions,
+		as lists of states, found with Tarjan's algorithm (without recursion). All
+		the states of a component are in each other's epsilon closures. Components
+		come in reverse topological order: a component comes after every other
+		component its epsilon transitions lead to.
+		"""
+
+		epsilon_moves = {state: destinations for (state, symbol), destinations in self.transitions.items() if symbol == 'e'}
+		states = set(range(1, self.num_states + 1))
+		states.add(self.start_state)
+		for (state, symbol), destinations in self.transitions.items():
+			states.add(state)
+			states.update(destinations)
+
+		components = []
+		indices = {}
+		lowlinks = {}
+		component_stack = []
+		on_stack = set()
+		for root in states:
+			if root in indices:
+				continue
+
+			indices[root] = lowlinks[root] = len(indices)
+			component_stack.append(root)
+			on_stack.add(root)
+			path = [(root, iter(epsilon_moves.get(root, ())))]
+			while path:
+				state, destinations = path[-1]
+				for destination in destinations:
+					if destination not in indices:
+						indices[destination] = lowlinks[destination] = len(indices)
+						component_stack.append(destination)
+						on_stack.add(destination)
+						path.append((destination, iter(epsilon_moves.get(destination, ()))))
+						break
+					if destination in on_stack:
+						lowlinks[state] = min(lowlinks[state], indices[destination])
+				else:
+					# Every epsilon transition of state is explored
+					path.pop()
+					if path:
+						parent = path[-1][0]
+						lowlinks[parent] = min(lowlinks[parent], lowlinks[state])
+					if lowlinks[state] == indices[state]:
+						component = []
+						while not component or component[-1] != state:
+							component.append(component_stack.pop())
+							on_stack.discard(component[-1])
+						components.append(component)
+
+		return components
+
+	def reduce(self):
+		"""
+		Contributor(s): Patrick
+		Returns an equivalent NFA with fewer states: the NFA without epsilon
+		transitions (see withoutEpsilons), trimmed of useless states (see trim),
+		with forward and then backward bisimilar states merged (see mergeBisimilar).
+		"""
+
+		return self.withoutEpsilons().trim().mergeBisimilar().mergeBisimilar(backward=True)
+
+	def trim(self):
+		"""
+		Contributor(s): Patrick
+		Returns an equivalent NFA, numbered from 1, with only the useful states:
+		the ones that can be reached from the start state and can reach an accept
+		state. The start state is always kept.
+		"""
+
+		forward_moves = {}
+		backward_moves = {}
+		for (state, symbol), destinations in self.transitions.items():
+			forward_moves.setdefault(state, []).extend(destinations)
+			for destination in destinations:
+				backward_moves.setdefault(destination, []).append(state)
+
+		reachable = self.reachableStates([self.start_state], forward_moves)
+		useful = reachable & self.reachableStates(self.accept_states, backward_moves)
+		useful.add(self.start_state)
+
+		numbers = {state: number for number, state in enumerate(sorted(useful), start=1)}
+		transitions = {}
+		for (state, symbol), destinations in self.transitions.items():
+			if state in numbers:
+				useful_destinations = {numbers[destination] for destination in destinations if destination in numbers}
+				if useful_destinations:
+					transitions[(numbers[state], symbol)] = useful_destinations
+
+		accept_states = [numbers[state] for state in self.accept_states if state in useful]
+		return NFA.fromTransitions(len(numbers), self.alphabet, transitions, numbers[self.start_state], accept_states)
+
+	def reachableStates(self, states, moves):
+		"""
+		Contributor(s): Patrick
+		Returns the set of states reachable from states, given a dictionary that
+		maps each state to the list of states it has a transition to.
+		"""
+
+		reached = set(states)
+		stack = list(reached)
+		while stack:
+			for destination in moves.get(stack.pop(), ()):
+				if destination not in reached:
+					reached.add(destination)
+					stack.append(destination)
+		return reached
+
+	def mergeBisimilar(self, backward=False):
+		"""
+		Contributor(s): Patrick
+		Returns an equivalent NFA, numbered from 1, in which bisimilar states are
+		merged, found by partition refinement.
+
+		Forward bisimilar states accept alike and, on each symbol, move into the
+		same blocks of states, so they accept the same strings from there on.
+		Backward bisimilar states are alike in being the start state or not and,
+		on each symbol, are moved into from the same blocks, so the same strings
+		lead to them. A merged state is the start state or an accept state if any
+		of its states is. The NFA must not have epsilon transitions.
+		"""
+
+		states = range(1, self.num_states + 1)
+		moves = {state: [] for state in states}
+		for (state, symbol), destinations in self.transitions.items():
+			for destination in destinations:
+				if backward:
+					moves[destination].append((symbol, state))
+				else:
+					moves[state].append((symbol, destination))
+
+		if backward:
+			blocks = {state: state == self.start_state for state in states}
+		else:
+			accept_states = set(self.accept_states)
+			blocks = {state: state in accept_states for state in states}
+
+		# Split blocks by the blocks their states move into until no block splits
+		num_blocks = len(set(blocks.values()))
+		while True:
+			signatures = {}
+			blocks = {state: signatures.setdefault((blocks[state], frozenset((symbol, blocks[next_state]) for symbol, next_state in moves[state])),
+												   len(signatures) + 1)
+					  for state in states}
+			if len(signatures) == num_blocks:
+				break
+			num_blocks = len(signatures)
+
+		transitions = {}
+		for (state, symbol), destinations in self.transitions.items():
+			transitions.setdefault((blocks[state], symbol), set()).update(blocks[destination] for destination in destinations)
+
+		accept_states = sorted({blocks[state] for state in self.accept_states})
+		return NFA.fromTransitions(num_blocks, self.alphabet, transitions, blocks[self.start_state], accept_states)
+
+	def withoutEpsilons(self):
+		"""
+		Contributor(s): Patrick
+		Returns an equivalent NFA with no epsilon transitions. On each symbol, a
+		state moves to every state that a state in its epsilon closure moves to,
+		and a state accepts if its epsilon closure holds an accept state. Only the
+		states reachable from the start state keep their transitions.
+		"""
+
+		closures = self.closureMasks()
+		accept_mask = 0
+		for state in self.accept_states:
+			accept_mask |= 1 << state
+
+		symbol_transitions = {}
+		for (state, symbol), destinations in self.transitions.items():
+			if symbol != 'e':
+				symbol_transitions.setdefault(state, []).append((symbol, destinations))
+
+		transitions = {}
+		reached = {self.start_state}
+		stack = [self.start_state]
+		while stack:
+			state = stack.pop()
+			moves = {}
+			closure = closures[state]
+			while closure:
+				lowest_bit = closure & -closure
+				for symbol, destinations in symbol_transitions.get(lowest_bit.bit_length() - 1, ()):
+					moves.setdefault(symbol, set()).update(destinations)
+				closure ^= lowest_bit
+
+			for symbol, destinations in moves.items():
+				transitions[(state, symbol)] = destinations
+				for destination in destinations - reached:
+					reached.add(destination)
+					stack.append(destination)
+
+		accept_states = [state for state in sorted(reached) if closures[state] & accept_mask]
+		return NFA.fromTransitions(self.num_states, self.alphabet, transitions, self.start_state, accept_states)
+
+	def moveMasks(self, closures):
+		"""
+		Contributor(s): Patrick
+		Given the epsilon closure bitmasks of closureMasks, returns a dictionary
+		that maps each transition label (a symbol or an interval label) to a
+		dictionary from each NFA state with a transition on that label to the
+		bitmask of the states it can reach by reading one of the label's
+		symbols (epsilon closures included).
+		"""
+
+		moves = {}
+		for (state, symbol), destinations in self.transitions.items():
+			if symbol == 'e':
+				continue
+			mask = 0
+			for destination in destinations:
+				mask |= closures[destination]
+			moves.setdefault(symbol, {})[state] = mask
+
+		return moves
+
+	@staticmethod
+	def moveSubset(subset, moves_on_symbol):
+		"""
+		Contributor(s): Patrick
+		Returns the bitmask of the states reachable from the states in bitmask
+		subset by reading one symbol, given that symbol's moves from moveMasks.
+		"""
+
+		next_subset = 0
+		while subset:
+			lowest_bit = subset & -subset
+			next_subset |= moves_on_symbol.get(lowest_bit.bit_length() - 1, 0)
+			subset ^= lowest_bit
+
+		return next_subset
+
+	def parallelSuccessors(self, executor, frontier, batch_size=256):
+		"""
+		Contributor(s): Patrick
+		Returns, for each subset in frontier, the list of its successor subsets,
+		one per alphabet equivalence class, computed by the worker processes of executor
+		(see initWorker) on consecutive batches of batch_size subsets. Only the moves
+		run in the workers: looking up and numbering the successors stays in this
+		process, and every batch and its results are pickled both ways.
+		"""
+
+		batches = [frontier[batch_start:batch_start + batch_size] for batch_start in range(0, len(frontier), batch_size)]
+		return [next_subsets for batch in executor.map(NFA.moveBatch, batches) for next_subsets in batch]
+
+	# Per-class moves (see symbolClasses) of a parallel subset construction worker process
+	worker_moves = None
+
+	@staticmethod
+	def initWorker(class_moves):
+		"""
+		Contributor(s): Patrick
+		Sets up a parallel subset construction worker process with the moves of
+		each alphabet equivalence class.
+		"""
+
+		NFA.worker_moves = class_moves
+
+	@staticmethod
+	def moveBatch(batch):
+		"""
+		Contributor(s): Patrick
+		Returns, for each subset in batch, the list of its successor subsets in a
+		parallel subset construction worker process.
+		"""
+
+		return [[NFA.moveSubset(subset, moves_on_symbol) for moves_on_symbol in NFA.worker_moves] for subset in batch]
+
+	def minimizeDFA(self, dfa_construction=tuple()):
+		"""
+		Contributor(s): Patrick
+		Returns the construction (see constructDFA) of the DFA with the fewest
+		states that is equivalent to the input DFA construction, found with
+		Hopcroft's algorithm (pa1's DFA.hopcroft). The minimal DFA's states are
+		numbered from 1, starting with its start state.
+		"""
+
+		dfa_states, dfa_transitions, dfa_start_state, dfa_accept_states = dfa_construction
+		state_indices = {state: index for index, state in enumerate(dfa_states)}
+		symbols = list(dict.fromkeys(self.alphabet))
+
+		next_states = [[state_indices[dfa_transitions[(state, symbol)]] for symbol in symbols] for state in dfa_states]
+		accepting = [False] * len(dfa_states)
+		for state in dfa_accept_states:
+			accepting[state_indices[state]] = True
+
+		state_map, representatives = pa1.DFA.hopcroft(next_states, accepting, state_indices[dfa_start_state])
+
+		min_transitions = {}
+		for number, representative in enumerate(representatives, start=1):
+			for index, symbol in enumerate(symbols):
+				min_transitions[(number, symbol)] = state_map[next_states[representative][index]]
+		min_accept_states = [number for number, representative in enumerate(representatives, start=1) if accepting[representative]]
 
-		return {state: count for count, state in enumerate(dfa_states, start=1)}
+		return (list(range(1, len(representatives) + 1)), min_transitions, 1, min_accept_states)
 
 	def writeDFA(self, dfa_filename, dfa_construction=tuple()):
 		"""
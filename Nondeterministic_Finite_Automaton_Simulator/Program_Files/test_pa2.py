@@ -3,12 +3,122 @@
 # Date: July 1, 2020
 # Description: Tests pa2 for comp 370, fall 2020
 
+import os
+import sys
+import tempfile
+
 import pa1
 import pa2
 
+# Number of failed checks: the tests exit with status 1 if there are any
+failures = 0
+
 def read_results_file(filename):
-    file = open(filename)
-    return [True if result == "Accept" else False for result in file.read().split()]
+    with open(filename) as file:
+        return [True if result == "Accept" else False for result in file.read().split()]
+
+def check_results(description, results, correct_results):
+    global failures
+    print(f"Testing {description}")
+    if results == correct_results:
+        print("  Correct results")
+    else:
+        print("  Incorrect results")
+        failures += 1
+        print(f"  Your results = {results}")
+        print(f"  Correct results = {correct_results}")
+    print()
+
+def construct_outcome(nfa, **kwargs):
+    try:
+        return nfa.constructDFA(**kwargs)
+    except pa2.StateLimitExceeded:
+        return "StateLimitExceeded"
+
+def test_parallel_subset_construction():
+    # Every frontier is expanded by the worker processes, and the DFA has to be
+    # the same as with one process, including when it goes over max_states
+    min_parallel_frontier = pa2.NFA.min_parallel_frontier
+    pa2.NFA.min_parallel_frontier = 1
+    try:
+        for i in range(1, 15):
+            nfa = pa2.NFA(f"nfa{i}.txt")
+            num_states = len(nfa.constructDFA()[0])
+            results = [construct_outcome(nfa, workers=2), construct_outcome(nfa, max_states=num_states - 1, workers=2)]
+            check_results(f"parallel subset construction nfa{i}.txt", results,
+                          [nfa.constructDFA(), "StateLimitExceeded"])
+    finally:
+        pa2.NFA.min_parallel_frontier = min_parallel_frontier
+
+def read_strings(filename):
+    with open(filename) as string_file:
+        return [str.strip() for str in string_file]
+
+def epsilon_closure(nfa, state):
+    closure, stack = {state}, [state]
+    while stack:
+        for destination in nfa.transitions.get((stack.pop(), "e"), ()):
+            if destination not in closure:
+                closure.add(destination)
+                stack.append(destination)
+    return sum(1 << state for state in closure)
+
+def test_epsilon_elimination():
+    for i in range(1, 15):
+        nfa = pa2.NFA(f"nfa{i}.txt")
+        strings = read_strings(f"str{i}.txt")
+        closures = nfa.closureMasks()
+        epsilon_free_nfa = nfa.withoutEpsilons()
+        results = ([closures[state] for state in range(1, nfa.num_states + 1)],
+                   any(symbol == "e" for state, symbol in epsilon_free_nfa.transitions),
+                   epsilon_free_nfa.simulate_many(strings))
+        check_results(f"epsilon closures and elimination nfa{i}.txt", results,
+                      ([epsilon_closure(nfa, state) for state in range(1, nfa.num_states + 1)], False,
+                       nfa.simulate_many(strings)))
+
+    # States 1, 2 and 3 are on an epsilon cycle, so they share one closure
+    nfa = pa2.NFA.fromTransitions(4, "a", {(1, "e"): {2}, (2, "e"): {3}, (3, "e"): {1}, (3, "a"): {4}, (4, "e"): {2}}, 1, [4])
+    closures = nfa.closureMasks()
+    results = (sorted(sorted(component) for component in nfa.epsilonComponents()),
+               [closures[state] for state in range(1, 5)], nfa.withoutEpsilons().simulate_many(["", "a", "aa"]))
+    check_results("epsilon cycles", results, ([[1, 2, 3], [4]], [0b1110, 0b1110, 0b1110, 0b11110], [False, True, True]))
+
+def test_reduce():
+    for i in range(1, 15):
+        nfa = pa2.NFA(f"nfa{i}.txt")
+        strings = read_strings(f"str{i}.txt")
+        reduced_nfa = nfa.reduce()
+        check_results(f"reduce nfa{i}.txt", (reduced_nfa.num_states <= nfa.num_states, reduced_nfa.simulate_many(strings)),
+                      (True, nfa.simulate_many(strings)))
+
+    # State 5 cannot reach the accept state and state 6 cannot be reached,
+    # so they are trimmed, and states 2 and 3 are bisimilar, so they are merged
+    transitions = {(1, "a"): {2, 3}, (2, "b"): {4}, (3, "b"): {4}, (1, "b"): {5}, (5, "a"): {5}, (6, "a"): {4}}
+    nfa = pa2.NFA.fromTransitions(6, "ab", transitions, 1, [4])
+    strings = ["", "a", "ab", "aba", "ba"]
+    results = (nfa.trim().num_states, nfa.reduce().num_states, nfa.reduce().simulate_many(strings))
+    check_results("trim and bisimulation merge", results, (4, 3, [False, False, True, False, False]))
+
+def symbol_classes(nfa):
+    return nfa.symbolClasses(nfa.moveMasks(nfa.closureMasks()))[0]
+
+def test_symbol_classes():
+    # 'a' and 'b' move alike, and 'd' has no moves
+    nfa = pa2.NFA.fromTransitions(3, "abcd", {(1, "a"): {2}, (1, "b"): {2}, (1, "c"): {3}}, 1, [2, 3])
+    check_results("alphabet equivalence classes", symbol_classes(nfa), {"a": 0, "b": 0, "c": 1, "d": 2})
+
+    # 'b' is in the interval label 'a-c' and has a move of its own
+    interval_nfa = pa2.NFA.fromTransitions(3, "abcd", {(1, "a-c"): {2}, (1, "b"): {3}}, 1, [2, 3])
+    check_results("alphabet equivalence classes of intervals", symbol_classes(interval_nfa),
+                  {"a": 0, "b": 1, "c": 0, "d": 2})
+
+    # States 2 and 3 of the first NFA are merged, so the DFA cannot tell 'a', 'b'
+    # and 'c' apart either, and its transition table has a column per class
+    with tempfile.TemporaryDirectory() as directory:
+        dfa_filename = os.path.join(directory, "dfa.txt")
+        nfa.toDFA(dfa_filename)
+        dfa = pa1.DFA(dfa_filename)
+    check_results("DFA table columns", (dfa.row_width, dfa.symbol_ids), (2, {"a": 0, "b": 0, "c": 0, "d": 1}))
 
 if __name__ == "__main__":
     num_test_files = 14
@@ -29,26 +139,62 @@ if __name__ == "__main__":
             # Create the DFA
             dfa = pa1.DFA(dfa_filename)
 
-            # Open string file.
-            string_file = open(input_filename)
+            # Read the test strings
+            with open(input_filename) as string_file:
+                strings = [str.strip() for str in string_file]
 
             # Simulate DFA on test strings
             results = []
-            for str in string_file:
-                results.append(dfa.simulate(str.strip()))
+            for str in strings:
+                results.append(dfa.simulate(str))
+
+            # Simulate all test strings at once, which has to agree with simulate
+            batch_results = [bool(result) for result in dfa.simulate_many(strings)]
 
             # Get correct results
             correct_results = read_results_file(correct_results_filename)
 
             # Check if correct
-            if results == correct_results:
+            if results == correct_results and batch_results == results:
                 print("  Correct results")
             else:
                 print("  Incorrect results")
+                failures += 1
                 print(f"  Your results = {results}")
                 print(f"  Correct results = {correct_results}")
+                print(f"  simulate_many results = {batch_results}")
             print()
         except OSError as err:
             print(f"Could not open file: {err}")
+            failures += 1
         except Exception as err:
-            print(f"Error simulating dfa: {err}")
\ No newline at end of file
+            print(f"Error simulating dfa: {err}")
+            failures += 1
+
+    try:
+        test_parallel_subset_construction()
+    except Exception as err:
+        print(f"Error constructing dfa in parallel: {err}")
+        failures += 1
+
+    try:
+        test_epsilon_elimination()
+    except Exception as err:
+        print(f"Error eliminating epsilon transitions: {err}")
+        failures += 1
+
+    try:
+        test_reduce()
+    except Exception as err:
+        print(f"Error reducing nfa: {err}")
+        failures += 1
+
+    try:
+        test_symbol_classes()
+    except Exception as err:
+        print(f"Error finding alphabet classes: {err}")
+        failures += 1
+
+    if failures:
+        print(f"{failures} failed checks")
+        sys.exit(1)
@@ -11,12 +11,61 @@
 # 	The resulting DFA determines whether an input string is in the language of 
 # 	the regex or not.
 
+import hashlib
+import os
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from operator import length_hint
+
+try:
+	import numpy as np
+except ImportError: # NumPy is only needed by simulate_many
+	np = None
+
+# The NFA and DFA are the simulators from PA2 and PA1, in their programs' directories
+PROGRAMS = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for program in ("Nondeterministic_Finite_Automaton_Simulator", "Deterministic_Finite_Automaton_Simulator"):
+	sys.path.append(os.path.join(PROGRAMS, program, "Program_Files"))
+
+import pa1
+import pa2
+
+# Compile cache files hold pickled ASTs, NFAs and DFAs, so they are keyed on the
+# pickle protocol and the source of the modules defining their classes: any
+# change to those modules invalidates the files
+compile_cache_digest = hashlib.sha256(repr(pickle.HIGHEST_PROTOCOL).encode('utf-8'))
+for module_filename in (pa1.__file__, pa2.__file__, os.path.abspath(__file__)):
+	with open(module_filename, 'rb') as module_file:
+		compile_cache_digest.update(module_file.read())
+COMPILE_CACHE_DIGEST = compile_cache_digest.hexdigest()
+
 class InvalidExpression(Exception):
 	pass
+
+StateLimitExceeded = pa2.StateLimitExceeded
+
+class LexicalError(Exception):
+	pass
 	
 class RegEx:
 	""" Simulates a regular expression """
-	def __init__(self, filename):
+
+	# Pickled (AST, NFA, DFA) triples of recently built regexes, least recently used first
+	compile_cache = OrderedDict()
+	# Number of compiled regexes kept in compile_cache (0 turns the cache off)
+	compile_cache_size = 128
+	# Directory where compiled DFAs are also saved between runs, or None to keep them in memory only
+	compile_cache_dir = None
+	# Set collect_stats to True to record statistics on each regex's compilation (see build)
+	# in its stats dictionary. stats_hook, if set, is called with the regex and its stats
+	# once it is built, e.g. to forward them to a metrics system.
+	collect_stats = False
+	stats_hook = None
+	stats = None
+
+	def __init__(self, filename, minimize=False, lazy=False, cache_size=10000, max_states=None):
 		""" 
 		Contributor(s): Andres Rivera, Patrick Walker
 		
@@ -24,27 +73,306 @@ class RegEx:
 		in the file whose name is filename.
 
 		Also initializes the equivalent Abstract Syntax Tree (AST), as well as
-		the equivalent NFA and DFA. 
+		the equivalent NFA and DFA. If minimize is True, the DFA is minimized.
+
+		If lazy is True, the NFA is not fully converted to a DFA up front. Instead,
+		DFA states are built as simulate first reaches them, and at most cache_size
+		of them are kept at a time (see LazyDFA).
+
+		If max_states is given and the full DFA would have more states than that,
+		equivalent_dfa is None and the NFA is simulated directly instead.
+
+		A regex that was compiled before with the same alphabet, tokenized regex
+		and options is reused from the compile cache instead (see loadCompiled).
 		"""
 		
 		with open(filename) as regex_file:
-			self.alphabet = regex_file.readline().rstrip()
-			self.operators = ('|', '*', 'concat')
-			self.tokenized_regex = self.preprocess(regex_file.readline().rstrip())
-			self.equivalent_ast = self.regexToAST()
-			self.equivalent_nfa = self.constructNFA()
-			self.equivalent_dfa = DFA(self.equivalent_nfa, self.alphabet)
+			alphabet = regex_file.readline().rstrip()
+			self.parse(regex_file.readline().rstrip(), alphabet)
+
+		self.build(minimize, lazy, cache_size, max_states)
+
+	@classmethod
+	def fromString(cls, regex, alphabet, minimize=False, lazy=False, cache_size=10000, max_states=None):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the RegEx object for the regex string regex over alphabet,
+		as __init__ would build it from a file holding those two lines.
+		"""
+
+		regex_object = cls.parsed(regex, alphabet)
+		regex_object.build(minimize, lazy, cache_size, max_states)
+		return regex_object
+
+	@classmethod
+	def parsed(cls, regex, alphabet):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns a RegEx object for the regex string regex over alphabet that
+		is only tokenized: its AST, NFA and DFA are not built until build is
+		called. Raises an InvalidExpression exception if regex is not valid.
+		"""
+
+		regex_object = cls.__new__(cls)
+		regex_object.parse(regex, alphabet)
+		return regex_object
+
+	def parse(self, regex, alphabet):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
+
+		Sets the alphabet and operators of the regex, and tokenizes the regex
+		string regex. Raises an InvalidExpression exception if regex is not valid.
+		"""
+
+		self.alphabet = alphabet
+		self.operators = ('|', '*', 'concat')
+		if RegEx.collect_stats:
+			self.stats = NFA.newStats()
+			self.stats.update(tokens=0, ast_nodes=0, rewrites={}, cache_hits=0)
+		self.tokenized_regex = self.timePhase('preprocess', self.preprocess, regex)
+
+	def build(self, minimize=False, lazy=False, cache_size=10000, max_states=None):
+		"""
+		Contributor(s): Patrick Walker
+
+		Initializes the equivalent AST, NFA and DFA of the tokenized regex with
+		the options described in __init__, from the compile cache if possible.
+
+		If collect_stats was set when the regex was parsed, stats then holds the
+		number of tokens and (simplified) AST nodes, the rewrites of simplifyAST,
+		whether the regex came from the compile cache, the NFA.newStats statistics
+		of the NFA to DFA conversion (with no rewrites, closures or subsets counted
+		on a cache hit, and no DFA states for a lazy DFA) and the wall time of
+		each phase: preprocess, regexToAST, simplify, constructNFA, constructDFA
+		and write (saving to the compile cache).
+		"""
+
+		# Scanning automata for search, built on first use
+		self.searcher = None
+
+		options = (minimize, lazy, cache_size, max_states)
+		if self.loadCompiled(options):
+			if self.stats is not None:
+				self.stats['cache_hits'] += 1
+		else:
+			self.compile(*options)
+			self.timePhase('write', self.saveCompiled, options)
+
+		if self.stats is not None:
+			self.stats['tokens'] = len(self.tokenized_regex)
+			self.stats['ast_nodes'] = len(self.equivalent_ast.nodes)
+			self.equivalent_nfa.recordSizes(self.stats)
+			if isinstance(self.equivalent_dfa, DFA):
+				self.stats['dfa_states'] = self.equivalent_dfa.num_states
+			if RegEx.stats_hook is not None:
+				RegEx.stats_hook(self, self.stats)
+
+	def timePhase(self, phase, function, *args):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns function(*args), recording the wall time it took as the time
+		of phase in stats if stats are being collected.
+		"""
+
+		if self.stats is None:
+			return function(*args)
+
+		start = time.perf_counter()
+		value = function(*args)
+		self.stats['seconds'][phase] = time.perf_counter() - start
+		return value
+
+	def compile(self, minimize=False, lazy=False, cache_size=10000, max_states=None):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
+
+		Builds the equivalent AST, NFA and DFA of the tokenized regex, with the
+		options described in __init__.
+		"""
+
+		ast = self.timePhase('regexToAST', self.regexToAST)
+		self.equivalent_ast, rewrites = self.timePhase('simplify', self.simplifyAST, ast)
+		if self.stats is not None:
+			self.stats['rewrites'] = rewrites
+		self.equivalent_nfa = self.timePhase('constructNFA', self.constructNFA)
+		if lazy:
+			self.equivalent_dfa = LazyDFA(self.equivalent_nfa, self.alphabet, cache_size)
+		else:
+			# The NFA counts closures and subsets into the regex's stats
+			self.equivalent_nfa.stats = self.stats
+			try:
+				self.equivalent_dfa = self.timePhase('constructDFA', DFA, self.equivalent_nfa, self.alphabet,
+													 minimize, max_states)
+			except StateLimitExceeded:
+				self.equivalent_dfa = None
+			finally:
+				del self.equivalent_nfa.stats
+
+	def cacheKey(self, options):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the compile cache key of the regex: its alphabet, its tokenized
+		regex (which normalizes spaces, implicit concatenation and '**') and the
+		compile options.
+		"""
+
+		return (self.alphabet, tuple(self.tokenized_regex)) + tuple(options)
+
+	def cacheFilename(self, key):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the name of the file in compile_cache_dir that holds the compiled
+		regex for key. The name is a hash of the key's contents and of
+		COMPILE_CACHE_DIGEST, so a changed regex, alphabet, option or module
+		never finds a stale file.
+		"""
+
+		digest = hashlib.sha256(repr((COMPILE_CACHE_DIGEST,) + key).encode('utf-8')).hexdigest()
+		return os.path.join(RegEx.compile_cache_dir, digest + '.pickle')
+
+	def loadCompiled(self, options):
+		"""
+		Contributor(s): Patrick Walker
+
+		Looks the regex up in the in-memory LRU compile cache, then in
+		compile_cache_dir if it is set. On a hit, sets the equivalent AST, NFA and
+		DFA to fresh copies unpickled from the cache, so regexes never share
+		them (a DFA builds its searcher, and a lazy DFA its states, in place),
+		and returns True; otherwise returns False.
+
+		Lazy DFAs are only cached in memory. The on-disk files are pickles, so
+		compile_cache_dir must only be shared with trusted processes.
+		"""
+
+		key = self.cacheKey(options)
+		compiled = RegEx.compile_cache.get(key)
+
+		if compiled is not None:
+			RegEx.compile_cache.move_to_end(key)
+		elif RegEx.compile_cache_dir is not None and not options[1]:
+			try:
+				with open(self.cacheFilename(key), 'rb') as cache_file:
+					cached_key, compiled = pickle.load(cache_file)
+			except (OSError, EOFError, pickle.UnpicklingError):
+				return False
+			if cached_key != key:
+				return False
+
+		if compiled is None:
+			return False
+
+		self.equivalent_ast, self.equivalent_nfa, self.equivalent_dfa = pickle.loads(compiled)
+		self.addToCompileCache(key, compiled)
+		return True
+
+	def saveCompiled(self, options):
+		"""
+		Contributor(s): Patrick Walker
+
+		Adds the just compiled regex to the in-memory compile cache, and writes
+		it to compile_cache_dir if that is set (and the DFA is not lazy). Both
+		hold it pickled, so later changes to this regex's objects do not leak
+		into the cache.
+		"""
+
+		save_to_dir = RegEx.compile_cache_dir is not None and not options[1]
+		if RegEx.compile_cache_size <= 0 and not save_to_dir:
+			return
+
+		key = self.cacheKey(options)
+		compiled = pickle.dumps((self.equivalent_ast, self.equivalent_nfa, self.equivalent_dfa),
+								protocol=pickle.HIGHEST_PROTOCOL)
+		self.addToCompileCache(key, compiled)
+
+		if save_to_dir:
+			os.makedirs(RegEx.compile_cache_dir, exist_ok=True)
+			filename = self.cacheFilename(key)
+
+			# Write to a temporary file first so readers never see a partial file
+			temporary_filename = f"{filename}.{os.getpid()}.tmp"
+			with open(temporary_filename, 'wb') as cache_file:
+				pickle.dump((key, compiled), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+			os.replace(temporary_filename, filename)
+
+	def addToCompileCache(self, key, compiled):
+		"""
+		Contributor(s): Patrick Walker
+
+		Stores the pickled compiled regex under key as the most recently used entry of the
+		in-memory compile cache, evicting the least recently used entries
+		beyond compile_cache_size.
+		"""
+
+		if RegEx.compile_cache_size <= 0:
+			return
+
+		RegEx.compile_cache[key] = compiled
+		RegEx.compile_cache.move_to_end(key)
+		while len(RegEx.compile_cache) > RegEx.compile_cache_size:
+			RegEx.compile_cache.popitem(last=False)
 		
 	def simulate(self, str):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
 
 		Returns True if the string str is in the language of
-		the "self" regular expression.
+		the "self" regular expression. Falls back on simulating the NFA
+		when the DFA was over its state limit.
 		"""
 
+		if self.equivalent_dfa is None:
+			return self.equivalent_nfa.simulate(str)
 		return self.equivalent_dfa.simulate(str)
 
+	def simulate_many(self, strings):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns, for each string in strings, whether it is in the language
+		of the "self" regular expression. See DFA.simulate_many.
+		"""
+
+		if self.equivalent_dfa is None:
+			return self.equivalent_nfa.simulate_many(strings)
+		return self.equivalent_dfa.simulate_many(strings)
+
+	def search(self, text):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the (start, end) offsets of the first match of the regex
+		inside text, or None if there is none. See Searcher.finditer.
+		"""
+
+		return next(self.finditer(text), None)
+
+	def finditer(self, text):
+		"""
+		Contributor(s): Patrick Walker
+
+		Yields the (start, end) offsets of the non-overlapping matches of
+		the regex inside text, from left to right. See Searcher.finditer.
+		"""
+
+		if self.searcher is None:
+			self.searcher = Searcher(self.equivalent_nfa, self.alphabet)
+		return self.searcher.finditer(text)
+
+	def count(self, text):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the number of matches finditer yields for text.
+		"""
+
+		return sum(1 for match in self.finditer(text))
+
 	def preprocess(self, regex):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
@@ -56,13 +384,15 @@ class RegEx:
 		and adds operators, parentheses, and symbols as separate tokens into a list.  If parentheses
 		are not balanced; if operators are missing operands; if there is a pair of parentheses with no regex inside it;
 		or if one of the characters in the regex string is unrecognizable, then the regex is invalid. 
+		A character class such as [a-z] is one operand token (see characterClass).
 		"""
 
-		token_list = [] #list of alphabet symbols, parens, and/or operators (including 'concat')
+		token_list = [] #list of alphabet symbols, character classes, parens, and/or operators (including 'concat')
 		prev_char = ''
 		unmatched_parens = 0
+		characters = iter(regex) # Shared with characterClass, which reads a class up to its ']'
 		
-		for char in regex:
+		for char in characters:
 			if char == ' ':
 				continue
 			elif char in self.alphabet or char in ['e', 'N']: # 'e' for epsilon; 'N' for empty set
@@ -85,6 +415,10 @@ class RegEx:
 					raise InvalidExpression("Invalid Expression")
 				token_list.append(char)
 				unmatched_parens -= 1
+			elif char == '[':
+				if prev_char not in ['(', '|', '', 'concat']: # Then, there is an implied concatenation
+					token_list.append('concat')
+				token_list.append(self.characterClass(characters))
 			else: # char is none of the above (i.e. it's unrecognizable)
 				raise InvalidExpression("Invalid Expression")
 			
@@ -94,6 +428,85 @@ class RegEx:
 			raise InvalidExpression("Invalid Expression")
 
 		return token_list 
+
+	def characterClass(self, characters):
+		"""
+		Contributor(s): Patrick Walker
+
+		Reads a character class from the iterator characters, which is just past
+		the class's '[', through its closing ']', and returns its operand token
+		(see classToken).
+
+		A class lists symbols and ranges of symbols, such as [a-z0-9_]. A '^'
+		first makes it match the alphabet symbols it does not list, and a '-'
+		first or last is the symbol '-'. Listed symbols outside the alphabet
+		match nothing. The class is invalid if it is not closed, lists nothing,
+		or has a range whose last symbol comes before its first.
+		"""
+		body = []
+		for char in characters:
+			if char == ']':
+				break
+			body.append(char)
+		else:
+			raise InvalidExpression("Invalid Expression")
+
+		negated = body[:1] == ['^']
+		if negated:
+			body.pop(0)
+		if not body:
+			raise InvalidExpression("Invalid Expression")
+
+		ranges = []
+		index = 0
+		while index < len(body):
+			if index + 2 < len(body) and body[index + 1] == '-':
+				if body[index] > body[index + 2]:
+					raise InvalidExpression("Invalid Expression")
+				ranges.append((body[index], body[index + 2]))
+				index += 3
+			else:
+				ranges.append((body[index], body[index]))
+				index += 1
+
+		return self.classToken([symbol for symbol in dict.fromkeys(self.alphabet)
+								if any(first <= symbol <= last for first, last in ranges) != negated])
+
+	@staticmethod
+	def classToken(symbols):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the operand token for a class of alphabet symbols: 'N' if it is
+		empty, the symbol if it has one, and otherwise the tuple of its sorted,
+		non-overlapping (first, last) intervals of consecutive code points, so
+		equal classes always have equal tokens.
+		"""
+		code_points = sorted(set(map(ord, symbols)))
+		if not code_points:
+			return 'N'
+		if len(code_points) == 1:
+			return chr(code_points[0])
+
+		intervals = [[code_points[0], code_points[0]]]
+		for code_point in code_points[1:]:
+			if code_point == intervals[-1][1] + 1:
+				intervals[-1][1] = code_point
+			else:
+				intervals.append([code_point, code_point])
+		return tuple((chr(first), chr(last)) for first, last in intervals)
+
+	@staticmethod
+	def classSymbols(token):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the list of symbols of an operand token that is a symbol or a
+		class of symbols (see classToken).
+		"""
+		if isinstance(token, str):
+			return [token]
+		return [chr(code_point) for first, last in token for code_point in range(ord(first), ord(last) + 1)]
 		
 	def regexToAST(self):
 		"""
@@ -106,28 +519,31 @@ class RegEx:
 		in the tokenized regex string and handles operators (i.e. '|', '*', and the implied 'concat'),
 		operands, left parentheses, and right parentheses in their own cases. The specific details
 		for each case follows the algorithm described in the program specifications document.
+
+		Nodes are hash-consed: identical subexpressions are the same node of the AST.
 		"""
 		operands = [] # Stack of ASTs
 		operators = [] # Stack of strings  
+		shared_nodes = {} # Hash-consing table of AST nodes (see ASTNode.shared)
 
 		for token in self.tokenized_regex: # read every token in our tokenized regex string
 			if token in self.operators: 
-				self.evaluateStacks(operators, operands, token)
+				self.evaluateStacks(operators, operands, token, shared_nodes)
 			elif token == '(':
 				operators.append(token)
 			elif token == ')':
 				while operators and (operators[-1] != '('):
-					self.makeAndSaveASTs(operators, operands)
+					self.makeAndSaveASTs(operators, operands, shared_nodes)
 				operators.pop() # Removes '('
 			else: # token is in the regex's alphabet, is epsilon ('e'), or is the empty set ('N')
-				operands.append(AST([token]))
+				operands.append(AST.operand(token, shared_nodes))
 
 		while operators:
-			self.makeAndSaveASTs(operators, operands) 
+			self.makeAndSaveASTs(operators, operands, shared_nodes) 
 		
 		return operands.pop()
 	
-	def evaluateStacks(self, operators, operands, scanned_operator):
+	def evaluateStacks(self, operators, operands, scanned_operator, shared_nodes=None):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker 
 
@@ -140,7 +556,7 @@ class RegEx:
 
 		while operators and operators[-1] != '(' \
 			and (self.precedence(operators[-1]) >= self.precedence(scanned_operator)): 
-			self.makeAndSaveASTs(operators, operands)
+			self.makeAndSaveASTs(operators, operands, shared_nodes)
 		operators.append(scanned_operator)
 
 	
@@ -158,23 +574,217 @@ class RegEx:
 		else: # operator == '|', least precedence 
 			return 0
 	
-	def makeAndSaveASTs(self, operators, operands):
+	def makeAndSaveASTs(self, operators, operands, shared_nodes=None):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
 
 		Makes a new AST out of the topmost operator of the operators stack and the topmost operand 
 		(or 2 topmost operands) of the operands stack, and saves this new AST back to the operands stack.
+		Its root node is hash-consed in shared_nodes, if given.
 		"""
 		operator = operators.pop()
 		if operator == '*': # Unary operator, so 1 operand needed
 			operand = operands.pop()
-			operands.append(AST.merge(operand, AST(), operator))
+			operands.append(AST.merge(operand, AST(), operator, shared_nodes))
 		else: # Binary operator, so 2 operands needed
 			operand2 = operands.pop()
 			operand1 = operands.pop()
-			operands.append(AST.merge(operand1, operand2, operator))
+			operands.append(AST.merge(operand1, operand2, operator, shared_nodes))
 
 	
+	def simplifyAST(self, ast):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns an AST for the same language as ast that is simplified with
+		rewrite rules (see simplifyNode) until none applies any more, along with
+		a dictionary from the name of each rule that applied to how many times
+		it did. The simplified AST is hash-consed like regexToAST's.
+		"""
+		rewrites = {}
+		root = ast.root
+		num_rewrites = -1
+		while num_rewrites != sum(rewrites.values()):
+			num_rewrites = sum(rewrites.values())
+
+			# Simplify every node once, children first
+			shared_nodes = {}
+			simplified = {None: None}
+			stack = [(root, False)]
+			while stack:
+				node, children_done = stack.pop()
+				if node in simplified:
+					continue
+				if children_done:
+					simplified[node] = self.simplifyNode(node.value, simplified[node.left], simplified[node.right],
+														 shared_nodes, rewrites)
+				else:
+					stack.append((node, True))
+					stack.append((node.right, False))
+					stack.append((node.left, False))
+			root = simplified[root]
+
+		simplified_ast = AST()
+		simplified_ast.root = root
+		return simplified_ast, rewrites
+
+	def simplifyNode(self, value, left, right, shared_nodes, rewrites):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the simplified node for the operator or operand value over the
+		already simplified subtrees left and right, counting each rule that
+		applies in rewrites. The rules are:
+
+		* annihilation: xN = Nx = N
+		* epsilon identity: xe = ex = x
+		* empty set identity: x|N = N|x = x
+		* idempotence: x|x = x
+		* class merging: a|[b-c]|x = [a-c]|x, for symbols and character classes
+		* epsilon absorption: e|x* = x*
+		* common-prefix factoring: xy|xz = x(y|z)
+		* star flattening: (x*)* = x* and (x*|y|e)* = (x|y)*
+		* star of epsilon or empty set: e* = N* = e
+		"""
+		def count(rule):
+			rewrites[rule] = rewrites.get(rule, 0) + 1
+
+		if value == 'concat':
+			if left.value == 'N' or right.value == 'N':
+				count('annihilation')
+				return ASTNode.shared(shared_nodes, 'N')
+			if left.value == 'e' or right.value == 'e':
+				count('epsilon identity')
+				return right if left.value == 'e' else left
+			return ASTNode.shared(shared_nodes, value, left, right)
+
+		if value == '*':
+			if left.value in ('e', 'N'):
+				count('star of epsilon or empty set')
+				return ASTNode.shared(shared_nodes, 'e')
+			if left.value == '*':
+				count('star flattening')
+				return left
+			if left.value == '|':
+				alternatives = self.alternativesOf(left)
+				starless_alternatives = [alternative.left if alternative.value == '*' else alternative
+										 for alternative in alternatives if alternative.value != 'e']
+				if starless_alternatives != alternatives:
+					count('star flattening')
+					union = self.unionOf(starless_alternatives, shared_nodes)
+					return ASTNode.shared(shared_nodes, '*', union) if union.value != 'e' else union
+			return ASTNode.shared(shared_nodes, value, left)
+
+		if value != '|':
+			return ASTNode.shared(shared_nodes, value)
+
+		alternatives = self.alternativesOf(left) + self.alternativesOf(right)
+		unchanged_alternatives = list(alternatives)
+
+		if any(alternative.value == 'N' for alternative in alternatives):
+			count('empty set identity')
+			alternatives = [alternative for alternative in alternatives if alternative.value != 'N']
+
+		if len(set(alternatives)) < len(alternatives):
+			count('idempotence')
+			alternatives = list(dict.fromkeys(alternatives))
+
+		# Symbols and classes are operands other than e and N; they merge into the first one's place
+		class_positions = [position for position, alternative in enumerate(alternatives)
+							if alternative.left is None and alternative.value not in ('e', 'N')]
+		if len(class_positions) > 1:
+			count('class merging')
+			symbols = [symbol for position in class_positions for symbol in self.classSymbols(alternatives[position].value)]
+			merged_class = ASTNode.shared(shared_nodes, self.classToken(symbols))
+			alternatives = [merged_class if position == class_positions[0] else alternative
+							for position, alternative in enumerate(alternatives) if position not in class_positions[1:]]
+
+		if any(alternative.value == 'e' for alternative in alternatives) \
+			and any(alternative.value == '*' for alternative in alternatives):
+			count('epsilon absorption')
+			alternatives = [alternative for alternative in alternatives if alternative.value != 'e']
+
+		# Group the alternatives by their first factor, in order of first appearance
+		groups = {}
+		for alternative in alternatives:
+			factors = self.factorsOf(alternative)
+			groups.setdefault(factors[0], []).append(factors[1:])
+		if len(groups) < len(alternatives):
+			count('common-prefix factoring')
+			alternatives = []
+			for prefix, suffixes in groups.items():
+				if len(suffixes) == 1:
+					alternatives.append(self.concatOf([prefix] + suffixes[0], shared_nodes))
+				else:
+					suffix_union = self.unionOf([self.concatOf(suffix, shared_nodes) for suffix in suffixes], shared_nodes)
+					alternatives.append(self.concatOf([prefix, suffix_union], shared_nodes))
+
+		if alternatives == unchanged_alternatives:
+			return ASTNode.shared(shared_nodes, value, left, right)
+		if not alternatives:
+			return ASTNode.shared(shared_nodes, 'N')
+		return self.unionOf(alternatives, shared_nodes)
+
+	def alternativesOf(self, node):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the list of alternatives of a chain of '|' nodes, left to right.
+		"""
+		alternatives = []
+		stack = [node]
+		while stack:
+			node = stack.pop()
+			if node.value == '|':
+				stack.append(node.right)
+				stack.append(node.left)
+			else:
+				alternatives.append(node)
+		return alternatives
+
+	def factorsOf(self, node):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the list of factors of a chain of 'concat' nodes, left to right.
+		"""
+		factors = []
+		stack = [node]
+		while stack:
+			node = stack.pop()
+			if node.value == 'concat':
+				stack.append(node.right)
+				stack.append(node.left)
+			else:
+				factors.append(node)
+		return factors
+
+	def unionOf(self, alternatives, shared_nodes):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the node of the union of a non-empty list of alternatives,
+		grouped from the left as regexToAST does.
+		"""
+		union = alternatives[0]
+		for alternative in alternatives[1:]:
+			union = ASTNode.shared(shared_nodes, '|', union, alternative)
+		return union
+
+	def concatOf(self, factors, shared_nodes):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the node of the concatenation of a list of factors, grouped
+		from the left as regexToAST does, or epsilon if there are none.
+		"""
+		if not factors:
+			return ASTNode.shared(shared_nodes, 'e')
+		concatenation = factors[0]
+		for factor in factors[1:]:
+			concatenation = ASTNode.shared(shared_nodes, 'concat', concatenation, factor)
+		return concatenation
+
 	def constructNFA(self):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
@@ -182,194 +792,586 @@ class RegEx:
 		Returns the NFA that is equivalent to the regex's equivalent AST.
 
 		The algorithm to build the equivalent NFA is to read through each node in the AST,
-		and depending on which node is read, the appropriate number of ASTs are used to construct that NFA.
+		and depending on which node is read, the appropriate number of sub-NFAs are used to construct that NFA.
 		Each NFA is constructed according to the proof of equivalence between NFAs and regexes (given in 
 		the book).
+
+		The sub-NFAs are fragments of one NFABuilder (see buildFragment), and a
+		subexpression that occurs more than once is only built once.
 		"""
-		nfa_stack = []
-		for node in self.equivalent_ast:
-			if node == '|':
-				nfa2 = nfa_stack.pop()
-				nfa1 = nfa_stack.pop()
-				nfa_stack.append(self.unionNFA(nfa1, nfa2))
-			elif node == '*':
-				nfa_stack.append(self.starNFA(nfa_stack.pop()))
-			elif node == 'concat':
-				nfa2 = nfa_stack.pop()
-				nfa1 = nfa_stack.pop()
-				nfa_stack.append(self.concatNFA(nfa1, nfa2))
-			elif node == 'N':
-				nfa_stack.append(self.emptySetNFA())
-			elif node == 'e': 
-				nfa_stack.append(self.epsilonNFA())
+		builder = NFABuilder(self.alphabet)
+		return builder.toNFA(self.buildFragment(builder, self.equivalent_ast))
+
+	def buildFragment(self, builder, ast):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
+
+		Adds the NFA equivalent to ast to builder, and returns it as a fragment.
+
+		The fragments of one builder draw their states from a shared counter and append their
+		transitions to a shared edge list, so no transition is copied or renumbered when an
+		operator is applied, and the NFA is built in time linear in the size of the AST.
+
+		Identical subexpressions share one node of the AST (see regexToAST), so the AST is
+		walked as a graph: the first time a shared operator node is built, its fragment is
+		recorded as a template, and later occurrences copy the template's states and
+		transitions instead of being built again. The NFA is the same either way.
+		"""
+		# Find the nodes that occur more than once
+		shared = set()
+		seen = set()
+		stack = [ast.root]
+		while stack:
+			node = stack.pop()
+			if node is None:
+				continue
+			if node in seen:
+				shared.add(node)
+			else:
+				seen.add(node)
+				stack.append(node.left)
+				stack.append(node.right)
+
+		templates = {}
+		fragment_stack = []
+		stack = [(ast.root, False)]
+		while stack:
+			node, children_done = stack.pop()
+			if node is None:
+				continue
+
+			if not children_done:
+				if node in templates:
+					fragment_stack.append(builder.copyTemplate(templates[node]))
+				else:
+					stack.append((node, (builder.num_states, len(builder.edges))))
+					stack.append((node.right, False))
+					stack.append((node.left, False))
+				continue
+
+			value = node.value
+			if value == '|':
+				fragment2 = fragment_stack.pop()
+				fragment1 = fragment_stack.pop()
+				fragment_stack.append(builder.union(fragment1, fragment2))
+			elif value == '*':
+				fragment_stack.append(builder.star(fragment_stack.pop()))
+			elif value == 'concat':
+				fragment2 = fragment_stack.pop()
+				fragment1 = fragment_stack.pop()
+				fragment_stack.append(builder.concat(fragment1, fragment2))
+			elif value == 'N':
+				fragment_stack.append(builder.emptySet())
+			elif value == 'e': 
+				fragment_stack.append(builder.epsilon())
+			elif isinstance(value, tuple):
+				fragment_stack.append(builder.symbolClass(value))
 			else:
-				nfa_stack.append(self.oneSymbolNFA(node))
+				fragment_stack.append(builder.oneSymbol(value))
+
+			# Operands are cheaper to build than to copy
+			if node in shared and node.left is not None:
+				num_states, num_edges = children_done
+				templates[node] = builder.makeTemplate(fragment_stack[-1], num_states, num_edges)
 			
-		return nfa_stack.pop()
+		return fragment_stack.pop()
+
+class Lexer:
+	""" Splits strings into tokens with an ordered list of regex rules """
 
-	def oneSymbolNFA(self, char: str):
+	def __init__(self, rules, alphabet):
+		"""
+		Contributor(s): Patrick Walker
+
+		Initializes a lexer from rules, an ordered list of (token name, regex string)
+		pairs over alphabet. Raises an InvalidExpression exception if a regex is
+		not valid.
+
+		All the rules are compiled into one DFA: each rule's NFA is added to one
+		NFABuilder, a new start state has an epsilon transition to each of their
+		start states, and the combined NFA goes through the subset construction.
+		Each DFA state is tagged with the first rule that has an accept state in
+		its subset, so when several rules match the same lexeme the earlier rule
+		wins. DFA states that cannot reach any accept state are marked dead.
+		"""
+
+		self.alphabet = alphabet
+		self.token_names = [name for (name, regex) in rules]
+
+		builder = NFABuilder(alphabet)
+		start_state = builder.newState()
+		rule_accept_masks = []
+		for name, regex in rules:
+			rule = RegEx.parsed(regex, alphabet)
+			fragment = rule.buildFragment(builder, rule.simplifyAST(rule.regexToAST())[0])
+			builder.edges.append((start_state, 'e', fragment[0]))
+
+			accept_mask = 0
+			for accept_state in fragment[1]:
+				accept_mask |= 1 << accept_state
+			rule_accept_masks.append(accept_mask)
+
+		accept_states = [state for state in range(1, builder.num_states + 1)
+							if any(mask >> state & 1 for mask in rule_accept_masks)]
+		subsets, successors, self.symbol_ids = builder.toNFA((start_state, accept_states)).subsetConstruction()
+
+		# The rule each DFA state accepts for, or None
+		self.accept_rules = []
+		for subset in subsets:
+			self.accept_rules.append(next((rule for rule, mask in enumerate(rule_accept_masks) if subset & mask), None))
+
+		# Dense table of row offsets with a column per alphabet equivalence class, as in DFA.compile
+		self.row_width = max(len(set(self.symbol_ids.values())), 1)
+		self.table = [next_index * self.row_width for row in successors for next_index in row]
+
+		# Dead states are the ones from which no accept state can be reached
+		previous_states = [[] for subset in subsets]
+		for state, row in enumerate(successors):
+			for next_index in row:
+				previous_states[next_index].append(state)
+		live = [rule is not None for rule in self.accept_rules]
+		stack = [state for state, is_live in enumerate(live) if is_live]
+		while stack:
+			for previous_state in previous_states[stack.pop()]:
+				if not live[previous_state]:
+					live[previous_state] = True
+					stack.append(previous_state)
+		self.dead = [not is_live for is_live in live]
+
+	def tokenize(self, text):
+		"""
+		Contributor(s): Patrick Walker
+
+		Yields the (token name, lexeme) pairs that text splits into, in order.
+
+		The text is read left to right with maximal munch: from the current
+		position, the combined DFA is run until it reaches a dead state or the
+		end of the text, and the longest non-empty prefix it accepted becomes
+		the next token. Raises a LexicalError if no rule matches a non-empty
+		prefix of the rest of the text.
+
+		The DFA may read past a token's end before dying, and the next token
+		starts at that end. The (state, offset) pairs read after a token's last
+		accept state cannot reach an accept state, so they are remembered and a
+		later token stops as soon as it reaches one (the memo of Reps'
+		linear-time maximal munch). Each offset is then read at most once per
+		DFA state, so tokenizing takes time linear in the length of text.
 		"""
-		Contributor(s): Andres Rivera
 
-		Returns the equivalent NFA for the case that
-		the (sub)regex is only one symbol in the alphabet.
+		table = self.table
+		symbol_ids = self.symbol_ids
+		row_width = self.row_width
+		accept_rules = self.accept_rules
+		dead = self.dead
+		# (state, offset) pairs known not to reach an accept state, as state * stride + offset
+		failed = set()
+		stride = len(text) + 1
+		position = 0
+
+		while position < len(text):
+			current_state = 0
+			token_rule = None
+			token_end = position
+			since_accept = []
+
+			for index in range(position, len(text)):
+				symbol_id = symbol_ids.get(text[index])
+				if symbol_id is None:
+					break
+				current_state = table[current_state + symbol_id]
+				pair = current_state * stride + index + 1
+				if pair in failed:
+					break
+				row = current_state // row_width
+				if dead[row]:
+					break
+				if accept_rules[row] is not None:
+					token_rule = accept_rules[row]
+					token_end = index + 1
+					since_accept.clear()
+				else:
+					since_accept.append(pair)
+			failed.update(since_accept)
+
+			if token_rule is None:
+				raise LexicalError(f"No token matches the text at position {position}")
+
+			yield (self.token_names[token_rule], text[position:token_end])
+			position = token_end
+
+class Searcher:
+	""" Finds the matches of an NFA's language inside longer strings """
 
-		The NFA only has two states, 1 and 2, where there is only one transition: (1,char) --> {2}.
-		State 2 is the only accept state while state 1 is the start state, and the NFA uses the (sub)regex's alphabet
+	def __init__(self, nfa, alphabet):
 		"""
-		return NFA(2, self.alphabet, {(1,char):{2}}, 1, [2])
+		Contributor(s): Patrick Walker
+
+		Initializes the two automata used to search for nfa's language L in a text:
 
+		* a reverse scanning DFA for Σ*·reverse(L), which reads the text once from
+		  right to left and accepts exactly at the offsets where a match of L starts,
+		* and the anchored DFA for L, which extends a match from its start to
+		  its longest end.
 
-	def epsilonNFA(self):
+		Both are built with the subset construction and stored as flat tables of
+		row offsets, as in DFA.compile, with a flag per row for accept states and,
+		for the anchored DFA, for dead states that cannot reach one. Each has its
+		own alphabet equivalence classes, since reversing the NFA can split them.
 		"""
-		Contributor(s): Andres Rivera
 
-		Returns the equivalent NFA for the case that the (sub)regex is epsilon ('e')
+		self.symbol_ids, self.row_width, self.table, self.accepting, self.dead = self.compileSubsets(
+			nfa.subsetConstruction(), nfa.accept_states)
+
+		# Reverse every transition, then add a start state that loops on every symbol
+		# and has an epsilon transition to each of the old accept states
+		scan_start = nfa.num_states + 1
+		edges = [(destination, symbol, state) for (state, symbol), destinations in nfa.transitions.items()
+					for destination in destinations]
+		edges += [(scan_start, symbol, scan_start) for symbol in dict.fromkeys(alphabet)]
+		edges += [(scan_start, 'e', accept_state) for accept_state in nfa.accept_states]
+		reverse_nfa = NFA.fromEdges(scan_start, alphabet, edges, scan_start, [nfa.start_state])
 
-		The NFA only has one state, 1. There are no transitions, but state 1 is both 
-		the start state and the only accept state. The NFA inherits the (sub)regex's alphabet.
+		self.scan_symbol_ids, self.scan_row_width, self.scan_table, self.scan_accepting, scan_dead = self.compileSubsets(
+			reverse_nfa.subsetConstruction(), reverse_nfa.accept_states)
+
+	def compileSubsets(self, subset_construction, accept_states):
 		"""
-		return NFA(1, self.alphabet, {}, 1, [1])
+		Contributor(s): Patrick Walker
 
-	def emptySetNFA(self):
+		Returns the symbol to class id dictionary, the row width (number of
+		classes), the flat table of row offsets, the accept flags and the dead
+		flags of the DFA given by subset_construction (see NFA.subsetConstruction),
+		whose states accept if their subset holds one of accept_states. The
+		start state is at offset 0.
 		"""
-		Contributor(s): Andres Rivera
 
-		Returns the equivalent NFA for the case that the (sub)regex is the empty set ('N').
+		subsets, successors, symbol_ids = subset_construction
+		row_width = max(len(set(symbol_ids.values())), 1)
+		accept_mask = 0
+		for accept_state in accept_states:
+			accept_mask |= 1 << accept_state
+
+		table = [next_index * row_width for row in successors for next_index in row]
+		accepting = [bool(subset & accept_mask) for subset in subsets]
+
+		# Dead states are the ones from which no accept state can be reached
+		previous_states = [[] for subset in subsets]
+		for state, row in enumerate(successors):
+			for next_index in row:
+				previous_states[next_index].append(state)
+		live = list(accepting)
+		stack = [state for state, is_live in enumerate(live) if is_live]
+		while stack:
+			for previous_state in previous_states[stack.pop()]:
+				if not live[previous_state]:
+					live[previous_state] = True
+					stack.append(previous_state)
+
+		return symbol_ids, row_width, table, accepting, [not is_live for is_live in live]
+
+	def finditer(self, text):
+		"""
+		Contributor(s): Patrick Walker
+
+		Yields the (start, end) offsets of the non-overlapping matches inside
+		text, from left to right. Each match starts as far left as possible and,
+		from there, is as long as possible. An empty match is only reported
+		where no other match starts, after which the search moves on one symbol,
+		like Python's re.finditer.
+
+		The scanning DFA first reads text once from right to left to mark every
+		offset where a match starts, so starts are never searched for by trying
+		each offset in turn. Symbols outside the alphabet cannot be part of a
+		match, so the scan restarts after them.
+
+		Each match is then extended with the anchored DFA, which may read past
+		its end before dying. The (state, offset) pairs read after a match's
+		last accept state cannot reach an accept state, so they are remembered
+		and a later extension stops as soon as it reaches one (the memo of
+		Reps' linear-time maximal munch). Each offset is then read at most once
+		per DFA state, and the search takes time linear in the length of text.
+		"""
 
-		The NFA has only one state (state 1), no transitions, no accept states, and the (sub)regex's 
-		alphabet. State 1 is also the start state.
+		row_width = self.row_width
+		symbol_ids = self.symbol_ids
+
+		scan_symbol_ids = self.scan_symbol_ids
+		scan_row_width = self.scan_row_width
+		scan_table = self.scan_table
+		scan_accepting = self.scan_accepting
+		starts = bytearray(len(text) + 1)
+		starts[len(text)] = scan_accepting[0]
+		current_state = 0
+		for index in range(len(text) - 1, -1, -1):
+			symbol_id = scan_symbol_ids.get(text[index])
+			if symbol_id is None:
+				current_state = 0
+			else:
+				current_state = scan_table[current_state + symbol_id]
+			starts[index] = scan_accepting[current_state // scan_row_width]
+
+		table = self.table
+		accepting = self.accepting
+		dead = self.dead
+		# (state, offset) pairs known not to reach an accept state, as state * stride + offset
+		failed = set()
+		stride = len(text) + 1
+		position = 0
+		while True:
+			start = starts.find(1, position)
+			if start == -1:
+				return
+
+			# Extend the match from start until the DFA dies, the text ends or
+			# a pair that is known to fail is reached
+			end = start
+			current_state = 0
+			since_accept = []
+			for index in range(start, len(text)):
+				symbol_id = symbol_ids.get(text[index])
+				if symbol_id is None:
+					break
+				current_state = table[current_state + symbol_id]
+				pair = current_state * stride + index + 1
+				if pair in failed:
+					break
+				row = current_state // row_width
+				if dead[row]:
+					break
+				if accepting[row]:
+					end = index + 1
+					since_accept.clear()
+				else:
+					since_accept.append(pair)
+			failed.update(since_accept)
+
+			yield (start, end)
+			position = end if end > start else end + 1
+
+class NFABuilder:
+	""" Builds an NFA out of fragments that share one state counter and edge list """
+
+	def __init__(self, alphabet):
 		"""
-		return NFA(1, self.alphabet, {}, 1, [])
+		Contributor(s): Patrick Walker
 
-	def unionNFA(self, nfa1, nfa2):
+		Initializes an empty builder for NFAs over alphabet.
+
+		A fragment is a sub-NFA, represented as a (start state, list of accept states)
+		pair. Every fragment's states come from num_states, and every transition is
+		appended to edges exactly once, as a (state, symbol or 'e', destination) triple.
+		"""
+		self.alphabet = alphabet
+		self.num_states = 0
+		self.edges = []
+
+	def newState(self):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns a new state, numbered one higher than the last one.
+		"""
+		self.num_states += 1
+		return self.num_states
+
+	def toNFA(self, fragment):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the NFA whose start and accept states are those of fragment.
+		"""
+		start_state, accept_states = fragment
+		return NFA.fromEdges(self.num_states, self.alphabet, self.edges, start_state, accept_states)
+
+	def oneSymbol(self, char):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
-		
-		Constructs an NFA, via the "|" operator, the union of two input NFAs.
-		The resulting NFA, with the appropriate components is returned to the constructNFA function.
-
-		The algorithm for constructing an NFA from the union of two other NFA's is to add a new state, 
-		define it as the start state, and renumber nfa1's and nfa2's states accordingly, so all states 
-		are unique. All states in nfa1 are renumbered as (1 + state in nfa1) - incrementing all nfa1's 
-		states by 1. Then, the algorithm renumbers nfa2's states by continuing where nfa1 left off, so 
-		nfa2's states are now (1 + state in nfa2 + number of states in nfa1 ).  
-		
-		Finally, the algorithm defines the new NFA according to the construction in the proof that union 
-		is closed under regular languages.
+
+		Returns the fragment for the case that the (sub)regex is only one symbol in the alphabet:
+		a start state with a single transition on char to the only accept state.
 		"""
-		num_states = 1 + nfa1.num_states + nfa2.num_states
+		start_state = self.newState()
+		accept_state = self.newState()
+		self.edges.append((start_state, char, accept_state))
+		return (start_state, [accept_state])
 
-		# Renumber nfa1's and nfa2's accept states and combine them 
-		accept_states = [1+state for state in nfa1.accept_states] + [1+state+nfa1.num_states for state in nfa2.accept_states]
+	def symbolClass(self, token):
+		"""
+		Contributor(s): Patrick Walker
 
-		transitions = {(1,'e'):{2,2+nfa1.num_states}} # new start state to nfa1's and nfa2's renumbered start states
+		Returns the fragment for a character class (see RegEx.classToken): a start state
+		with one transition to the only accept state for each interval of the class,
+		labeled with an interval label such as 'a-z' (see NFA.labelInterval), so the
+		class takes one edge per interval rather than one per symbol.
+		"""
+		start_state = self.newState()
+		accept_state = self.newState()
+		self.edges.extend((start_state, first if first == last else f"{first}-{last}", accept_state)
+						  for first, last in token)
+		return (start_state, [accept_state])
 
-		# Renumbering and saving nfa1's transitions
-		for (curr_state, symbol),set_states in nfa1.transitions.items():
-			renumbered_set = {state+1 for state in set_states}
-			transitions[(curr_state+1,symbol)] = renumbered_set
+	def epsilon(self):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
 
-		# Renumbering and saving nfa2's transitions
-		for (curr_state, symbol),set_states in nfa2.transitions.items():
-			renumbered_set = {1+state+nfa1.num_states for state in set_states}
-			transitions[(1+curr_state+nfa1.num_states, symbol)] = renumbered_set
+		Returns the fragment for the case that the (sub)regex is epsilon ('e'): one
+		state that is both the start state and the only accept state.
+		"""
+		state = self.newState()
+		return (state, [state])
 
-		return NFA(num_states, self.alphabet, transitions, 1, accept_states)
+	def emptySet(self):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
+
+		Returns the fragment for the case that the (sub)regex is the empty set ('N'):
+		one start state and no accept states.
+		"""
+		return (self.newState(), [])
 
-	def concatNFA(self,nfa1,nfa2):  # sourcery skip: set-comprehension
+	def union(self, fragment1, fragment2):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
-		
-		Constructs an NFA, via the "concat" operator, the concatenation of two input NFAs.
-		The resulting NFA, with the appropriate components is returned to the constructNFA function.
 
-		The algorithm for constructing an NFA from the concatenation of two other NFAs is an implementation
-		of the proof that concatenation is closed under regular languages. In renumbering our states, we 
-		incremented the states of nfa2 by the number of states in nfa1.
+		Returns the fragment for the union ("|") of two fragments, according to the
+		construction in the proof that union is closed under regular languages: a new
+		start state with epsilon transitions to both start states, accepting in either
+		fragment's accept states.
+
+		The accept state lists are merged by extending the longer one with the shorter
+		one, so a long chain of unions stays O(n log n) overall.
 		"""
-		
-		num_states = nfa1.num_states + nfa2.num_states 
-		transitions = {}
+		start_state = self.newState()
+		self.edges.append((start_state, 'e', fragment1[0]))
+		self.edges.append((start_state, 'e', fragment2[0]))
 
-		# For each accept state in NFA1, remove it from the accept states and 
-		# create an epsilon transition from that accept state to the start state of NFA2. 
-		while nfa1.accept_states: 
-			current_accept_state = nfa1.accept_states.pop() 
-			if (current_accept_state, 'e') in nfa1.transitions.keys():
-				nfa1.transitions[(current_accept_state, 'e')] = nfa1.transitions[(current_accept_state, 'e')].union({nfa1.num_states + 1})
-			else: 
-				transitions[(current_accept_state, 'e')] = {nfa2.start_state+nfa1.num_states}
-		
-		# Re-number the states in the transitions of NFA2.
-		for (curr_state, symbol), destinations in nfa2.transitions.items(): 
-			curr_state += nfa1.num_states
-			renumbered_set = set()
-			for state in destinations:
-				renumbered_set.add(state+nfa1.num_states)
-			transitions[(curr_state,symbol)] = renumbered_set
-		
-		# Add to the transitions, all of the transitions from NFA1
-		transitions.update(nfa1.transitions) 
+		accept_states1, accept_states2 = fragment1[1], fragment2[1]
+		if len(accept_states1) < len(accept_states2):
+			accept_states1, accept_states2 = accept_states2, accept_states1
+		accept_states1.extend(accept_states2)
 
-		# Re-number the accept states of NFA2
-		nfa2.accept_states = [accept_state + nfa1.num_states for accept_state in nfa2.accept_states]
+		return (start_state, accept_states1)
 
-		return NFA(num_states, self.alphabet, transitions, nfa1.start_state, nfa2.accept_states)
+	def makeTemplate(self, fragment, num_states, num_edges):
+		"""
+		Contributor(s): Patrick Walker
 
-	def starNFA(self, nfa):
+		Returns a template of fragment for copyTemplate, given the builder's
+		num_states and number of edges from just before fragment was built.
+		A fragment's states are numbered consecutively from num_states + 1,
+		and its transitions are the edges appended while it was built, which
+		stay in place since edges are only ever appended.
 		"""
-		Contributor(s): Andres Rivera, Patrick Walker
-		
-		Constructs an NFA, via the "*" operator, the star operation on a single NFA.
-		The resulting NFA, with the appropriate components is returned to the constructNFA function.
+		start_state, accept_states = fragment
+		return (num_states, self.num_states, num_edges, len(self.edges), start_state, tuple(accept_states))
 
-		The algorithm for constructing an NFA from applying the Kleene star on an NFA is an implementation of the proof that
-		this star operator is closed under regular languages. The algorithm renumbers the states of the original nfa by incrementing them by 1. 
+	def copyTemplate(self, template):
 		"""
+		Contributor(s): Patrick Walker
 
-		# The resulting NFA has one additional state
-		nfa.num_states += 1
+		Returns a new fragment that is a copy of the template's fragment, with
+		every state shifted past the builder's current states.
+		"""
+		first_state, last_state, first_edge, last_edge, start_state, accept_states = template
+		offset = self.num_states - first_state
+		self.num_states += last_state - first_state
+		self.edges.extend([(state + offset, symbol, destination + offset)
+						   for state, symbol, destination in self.edges[first_edge:last_edge]])
+		return (start_state + offset, [accept_state + offset for accept_state in accept_states])
+
+	def concat(self, fragment1, fragment2):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
 
-		new_transitions = {}
+		Returns the fragment for the concatenation of two fragments, according to the
+		proof that concatenation is closed under regular languages: each accept state of
+		fragment1 gets an epsilon transition to the start state of fragment2, and only
+		fragment2's accept states remain accepting.
+		"""
+		for accept_state in fragment1[1]:
+			self.edges.append((accept_state, 'e', fragment2[0]))
+		return (fragment1[0], fragment2[1])
 
-		# Add an epsilon transition from each of the NFAs accept states, to the NFAs start state, as long as an
-		# epsilon transition does not yet exist. If it does, add the NFA's start state to the set of destinations
-		for accept_state in nfa.accept_states: 
-			if (accept_state, 'e') not in nfa.transitions.keys():
-				nfa.transitions[(accept_state, 'e')] = {nfa.start_state}
-			else:
-				nfa.transitions[(accept_state, 'e')] = nfa.transitions[(accept_state, 'e')].union({nfa.start_state})
+	def star(self, fragment):
+		"""
+		Contributor(s): Andres Rivera, Patrick Walker
 
-		# The new start state is 1
-		nfa.start_state = 1
+		Returns the fragment for the star ("*") of a fragment, according to the proof that
+		the star operation is closed under regular languages: a new accepting start state
+		with an epsilon transition to the old start state, and an epsilon transition from
+		each accept state back to the old start state.
+		"""
+		start_state = self.newState()
+		self.edges.append((start_state, 'e', fragment[0]))
+		for accept_state in fragment[1]:
+			self.edges.append((accept_state, 'e', fragment[0]))
+		fragment[1].append(start_state)
+		return (start_state, fragment[1])
 
-		new_transitions[(nfa.start_state, 'e')] = {2} # the old start state was 1, thus it is now 2
+class ASTNode:
+	""" A node of an AST """
 
-		# Re-number the accept states of the NFA
-		nfa.accept_states = [accept_state + 1 for accept_state in nfa.accept_states] + [nfa.start_state]
+	__slots__ = ('value', 'left', 'right')
+
+	def __init__(self, value, left=None, right=None):
+		"""
+		Contributor(s): Patrick Walker
 
-		# Re-number the states in the transitions of the NFA
-		for (curr_state, symbol), destinations in nfa.transitions.items(): 
-			curr_state += 1
-			renumbered_set = {state+1 for state in destinations}
-			new_transitions[(curr_state,symbol)] = renumbered_set
+		Initializes a node holding value (an operator or an operand) and its
+		left and right subtrees' root nodes. Operands have no subtrees, and
+		'*' only has a left subtree.
+		"""
+		self.value = value
+		self.left = left
+		self.right = right
 
-		# Assign the newly-numbered transitions to be the NFAs transitions
-		nfa.transitions = new_transitions
+	@classmethod
+	def shared(cls, shared_nodes, value, left=None, right=None):
+		"""
+		Contributor(s): Patrick Walker
 
-		return nfa
+		Returns the node of shared_nodes with value and the subtrees left and
+		right, making it first if there is none. Since subtrees are shared the
+		same way, equal subtrees are always the same node, and looking one up
+		only compares its value and its children's identities.
+		"""
+		key = (value, left, right)
+		node = shared_nodes.get(key)
+		if node is None:
+			node = shared_nodes[key] = cls(value, left, right)
+		return node
 
 class AST: 
 	""" Simulates an AST """
 
+	__slots__ = ('root',)
+
 	def __init__(self, nodes=list()):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
 
 		Initializes AST from a list of nodes in postfix order
 		"""
-		self.nodes = nodes
+		subtrees = []
+		for node in nodes:
+			if node == '*':
+				subtrees.append(ASTNode(node, subtrees.pop()))
+			elif node in ('|', 'concat'):
+				right = subtrees.pop()
+				left = subtrees.pop()
+				subtrees.append(ASTNode(node, left, right))
+			else:
+				subtrees.append(ASTNode(node))
+		self.root = subtrees.pop() if subtrees else None
+
+	def __reduce__(self):
+		"""
+		Contributor(s): Patrick Walker
+
+		Pickles an AST as its list of nodes in postfix order, so that pickling
+		a deeply nested AST does not recurse once per level.
+		"""
+		return (self.__class__, (self.nodes,))
 	
 	def __str__(self):
 		"""
@@ -382,27 +1384,67 @@ class AST:
 
 	def __iter__(self):
 		"""
-		Contributor(s): Andres Rivera
+		Contributor(s): Andres Rivera, Patrick Walker
 
 		Defines how to iterate over an AST
-		Returns the iterator for the list of nodes
+		Returns an iterator over the nodes' values in postfix order, walking
+		the tree with an explicit stack rather than recursion
 		"""
-		return iter(self.nodes)
+		stack = [(self.root, False)]
+		while stack:
+			node, children_done = stack.pop()
+			if node is None:
+				continue
+			if children_done:
+				yield node.value
+			else:
+				stack.append((node, True))
+				stack.append((node.right, False))
+				stack.append((node.left, False))
+
+	@property
+	def nodes(self):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the list of the AST's nodes in postfix order
+		"""
+		return list(self)
 
 	@classmethod
-	def merge(cls, leftSubtree, rightSubtree, root):
+	def merge(cls, leftSubtree, rightSubtree, root, shared_nodes=None):
 		"""
 		Contributor(s): Andres Rivera, Patrick Walker
 
-		Combines two ASTs into postfix order
-		In our implementation, depth-first-traversal of 
-		the AST is equivalent to the postfix ordering of
-		the regex.
+		Combines two ASTs under a new root node in O(1) time,
+		without copying either subtree. In our implementation,
+		depth-first-traversal of the AST is equivalent to the
+		postfix ordering of the regex. If shared_nodes is given,
+		the root node is hash-consed in it (see ASTNode.shared).
+		"""
+		merged = cls()
+		if shared_nodes is None:
+			merged.root = ASTNode(root, leftSubtree.root, rightSubtree.root)
+		else:
+			merged.root = ASTNode.shared(shared_nodes, root, leftSubtree.root, rightSubtree.root)
+		return merged
+
+	@classmethod
+	def operand(cls, value, shared_nodes=None):
 		"""
-		return cls(leftSubtree.nodes + rightSubtree.nodes + [root])
+		Contributor(s): Patrick Walker
 
-class NFA:
-	""" Simulates an NFA """
+		Returns the AST of a single operand, whose node is hash-consed
+		in shared_nodes if given.
+		"""
+		if shared_nodes is None:
+			return cls([value])
+		operand = cls()
+		operand.root = ASTNode.shared(shared_nodes, value)
+		return operand
+
+class NFA(pa2.NFA):
+	""" Simulates an NFA built in memory (see pa2's NFA) """
 
 	def __init__(self, num_states, alphabet, transitions, start_state, accept_states):
 		"""
@@ -416,206 +1458,267 @@ class NFA:
 		self.start_state = start_state # int()
 		self.accept_states = accept_states # [] of int()
 
+		# Start subset, per-symbol moves and accept bitmask for simulate, built on first use
+		self.simulation_masks = None
 
-	def toDFA(self, dfa_filename):
+	@classmethod
+	def fromEdges(cls, num_states, alphabet, edges, start_state, accept_states):
 		"""
-		Contributor(s): Andres, Patrick
-		Converts the "self" NFA into an equivalent DFA
-		and writes it to the file whose name is dfa_filename.
-		The format of the DFA file must have the same format
-		as described in the first programming assignment (pa1).
-		This file must be able to be opened and simulated by your
-		pa1 program.
-
-		This function should not read in the NFA file again.  It should
-		create the DFA from the internal representation of the NFA that you 
-		created in __init__.
+		Contributor(s): Patrick
+		Initializes NFA from a list of (state, symbol or 'e', destination) edges,
+		grouping them into the transitions dictionary in a single pass.
 		"""
 
-		# Converts the "self" NFA into an equivalent DFA 
-		dfa_construction = self.constructDFA()
-		
-		# Writes the constructed DFA to an external file based on the input filename
-		self.writeDFA(dfa_filename, dfa_construction)
-		
-	
-	def constructDFA(self):
+		transitions = {}
+		for state, symbol, destination in edges:
+			if (state, symbol) in transitions:
+				transitions[(state, symbol)].add(destination)
+			else:
+				transitions[(state, symbol)] = {destination}
+
+		return cls(num_states, alphabet, transitions, start_state, accept_states)
+
+class DFA(pa1.DFA):
+	""" Simulates the DFA of an NFA (see pa1's DFA) """
+
+	def __init__(self, nfa, alphabet, minimize=False, max_states=None):
 		"""
-		Contributor(s): Patrick, Andres
-		Convert the internal representation of the NFA to an equivalent DFA. 
-		Returns a tuple construction of the DFA - the states, transitions, 
-		start state and accept states. Also, converts sets of states into 
-		single number states to be consistent with PA1 DFA definitions.
+		Contributor(s): Andres Rivera, Patrick Walker
+		Initializes a DFA from memory using the equivalent DFA of an NFA and the
+		regex's alphabet. If minimize is True, the DFA is minimized. Raises
+		StateLimitExceeded if the DFA would have more than max_states states.
 		"""
 		
-		# DFA internal representation
-		dfa_start_state = self.epsilon({self.start_state})
-		dfa_accept_states = []
-		dfa_transitions = {}
-		dfa_states = [dfa_start_state]
-		new_state_queue = [dfa_start_state]
-		
-		# While there are newly found states in new_state_queue, 
-		# continue to find transitions
-		while new_state_queue:
-			for symbol in self.alphabet:
-				current_state = frozenset(new_state_queue[0])
-				new_dfa_state = self.getDFADestination(current_state, symbol)
-				dfa_transitions[(current_state, symbol)] = new_dfa_state
-				if new_dfa_state not in dfa_states:
-					dfa_states.append(new_dfa_state)
-					new_state_queue.append(new_dfa_state)
-
-			new_state_queue.pop(0)
-
-		# All DFA accept states are states that contain an NFA accept state
-		dfa_accept_states = [state for state in dfa_states for accept_state in self.accept_states if accept_state in state]					
-		
-		# Changes DFA definition components to have unique single numbers instead of sets of states
-		setStatesToNumber = self.getSetStatesToNumber(dfa_states)
-		dfa_states = self.toListOfNumbers(dfa_states, setStatesToNumber)
-		dfa_accept_states = self.toListOfNumbers(dfa_accept_states, setStatesToNumber)
-		dfa_transitions = self.toTransitionsOfNumbers(dfa_transitions, setStatesToNumber)
-		
-		return (dfa_states, dfa_transitions, setStatesToNumber[dfa_start_state], dfa_accept_states)
-		
-	def epsilon(self, states=set()):
-		"""
-		Contributor(s): Andres, Patrick 
-		Defines the epsilon function - takes in a set of states and 
-		returns the set of states that contains the "from" and "to" 
-		state in an epsilon transition. It also continuously checks 
-		for further epsilon transitions.
-		"""
+		equivalent_dfa = nfa.constructDFA(minimize, max_states)
+		self.num_states = len(equivalent_dfa[0])
+		self.alphabet = alphabet
+		self.transitions = equivalent_dfa[1]
+		self.start_state = equivalent_dfa[2]
+		self.accept_states = equivalent_dfa[3]
 
-		new_state = states
-		state_sets_list = [states]
+		# Scanning automata for search, built on first use
+		self.searcher = None
 
-		# While there are epsilon transitions in at least 1 state in the set of states, 
-		# apply the epsilon function to that state in the set of states
-		while state_sets_list:
-			for state in state_sets_list[0]:
-				if(state, 'e') in self.transitions.keys():
-					new_state = new_state.union(self.transitions[state, 'e'])
-					# Stores the new set of states from the epsilon transition to apply the epsilon function on this new set
-					state_sets_list.append(self.transitions[(state, 'e')])
-			state_sets_list.pop(0)
+		self.compile()
 
-		return frozenset(new_state)
+	def search(self, text):
+		"""
+		Contributor(s): Patrick Walker
 
-	def getDFADestination(self, current_state, symbol):
+		Returns the (start, end) offsets of the first match of the DFA's
+		language inside text, or None if there is none.
 		"""
-		Contributor(s): Patrick, Andres
-		Based on the input set of states "current_state", returns an output state that
-		is the union of destination states states that come from the transitions from 
-		each state in current_state via the input symbol.
+		return next(self.finditer(text), None)
+
+	def finditer(self, text):
 		"""
+		Contributor(s): Patrick Walker
 
-		new_state = set()
-		for element in current_state:
-			if (element,symbol) in self.transitions.keys():
-				new_state = new_state.union(self.epsilon(self.transitions[(element, symbol)]))
-		return frozenset(new_state)
-	
-	def toTransitionsOfNumbers(self, dict_of_transitions = dict(), setStatesToNumber = dict()):
+		Yields the (start, end) offsets of the non-overlapping matches of the
+		DFA's language inside text, from left to right. See Searcher.finditer.
 		"""
-		Contributor(s): Andres
-		Given a dictionary of sets of states that map to single numbered states,
-		convert the current state and next state in a dictionary of "(current state, symbol) --> next state"
-		transitions from sets of states to single numbered states.
+		if self.searcher is None:
+			transitions = {key: {next_state} for key, next_state in self.transitions.items()}
+			nfa = NFA(max(self.state_ids), self.alphabet, transitions, self.start_state, self.accept_states)
+			self.searcher = Searcher(nfa, self.alphabet)
+		return self.searcher.finditer(text)
 
-		Returns a dictionary of (current state, symbol) --> next state transitions with all the states
-		as numbers.
+	def count(self, text):
 		"""
-		
-		dfa_transition_numbers = {}
-		for (state_symbol_tuple, next_state) in dict_of_transitions.items():
-			current_state = state_symbol_tuple[0]
-			symbol = state_symbol_tuple[1]
-			# Populate new dictionary of transitions with current_state and next_state as single numbered states
-			dfa_transition_numbers[(setStatesToNumber[current_state], symbol)] = setStatesToNumber[next_state]
-		return dfa_transition_numbers
+		Contributor(s): Patrick Walker
 
-	def toListOfNumbers(self, list_of_states = list(), setStatesToNumber = dict()):
+		Returns the number of matches finditer yields for text.
 		"""
-		Contributor(s): Andres
-		Given a dictionary of sets of states that map to singled numbered states, 
-		convert a list of sets of states into a list of single numbered states.
+		return sum(1 for match in self.finditer(text))
 
-		Returns a list of single numbered states.
+class LazyDFA:
+	""" Simulates a DFA that is built from an NFA on demand """
+
+	# Fewest symbols simulate must read per state built between two flushes
+	# for the cache to be worth keeping (RE2 uses the same ratio)
+	min_symbols_per_state = 10
+
+	def __init__(self, nfa, alphabet, cache_size=10000):
+		"""
+		Contributor(s): Patrick Walker
+
+		Initializes a lazy DFA from an NFA and the regex's alphabet. No DFA states
+		are built yet: each state (a bitmask of NFA states, as in
+		NFA.subsetConstruction) and each transition is built the first time
+		simulate reaches it, and then cached.
+
+		The cache holds at most cache_size states. When a new state does not fit,
+		the whole cache is flushed and building starts over from the current
+		state, so memory stays bounded even for regexes whose full DFA is
+		exponentially large, while inputs that revisit the same few states run
+		at close to DFA speed.
+
+		If the cache fills up again before simulate has read
+		min_symbols_per_state symbols per state it holds, the cache is
+		thrashing: building states costs more than it saves. The lazy DFA then
+		falls back for good to simulating the NFA, stepping bitmasks of NFA
+		states without caching them.
 		"""
-		
-		for index in range(len(list_of_states)):
-			list_of_states[index] = setStatesToNumber[list_of_states[index]]
 
-		return list_of_states
-		
-	def getSetStatesToNumber(self, dfa_states=frozenset()):
+		self.nfa = nfa
+		self.alphabet = alphabet
+		self.cache_size = max(cache_size, 2)
+		self.flushes = 0 # times the cache was flushed
+		self.states_built = 0 # DFA states built, including rebuilt ones
+		self.symbols_read = 0 # symbols read by the DFA (not by the NFA fallback)
+		self.symbols_at_flush = 0 # symbols_read at the last flush
+		self.nfa_fallback = False # whether simulate now simulates the NFA
+
+		closures = nfa.closureMasks()
+		# Transitions are built per alphabet equivalence class (see NFA.symbolClasses)
+		self.symbol_ids, self.symbol_moves = nfa.symbolClasses(nfa.moveMasks(closures))
+		self.start_subset = closures[nfa.start_state]
+		self.accept_mask = 0
+		for state in nfa.accept_states:
+			self.accept_mask |= 1 << state
+
+		self.flush()
+
+	def flush(self):
 		"""
-		Contributor(s): Andres
-		Creates a mapping of set of states to single numbered states.
+		Contributor(s): Patrick Walker
 
-		Returns a dictionary of these mappings.
+		Empties the cache of built DFA states and transitions.
 		"""
 
-		return {state: count for count, state in enumerate(dfa_states, start=1)}
+		self.subsets = [] # state id -> bitmask of NFA states
+		self.state_ids = {} # bitmask of NFA states -> state id
+		self.next_states = [] # state id -> next state id per symbol id, or None if not built yet
+		self.accepting = [] # state id -> whether it is an accept state
+		self.dead = [] # state id -> whether its subset is empty, so no accept state can be reached
 
-	def writeDFA(self, dfa_filename, dfa_construction=tuple()):
+	def getState(self, subset):
 		"""
-		Contributor(s): Patrick 
-		Using a DFA construction input, this function writes to a text file 
-		(input filename) the PA1 definition of a DFA.  
-		Expects singled numbered DFA definition components.
+		Contributor(s): Patrick Walker
 
-		DFA construction referenced at: 0, DFA states; 
-										1, DFA transitions; 
-										2, DFA start state; 
-										3, DFA accept states.
+		Returns the id of the DFA state for the bitmask subset, building it (and
+		flushing the cache first if it is full) if it is not cached.
 		"""
-		
-		with open(dfa_filename, 'w') as dfa_file:
-			dfa_file.write(str(len(dfa_construction[0])) + "\n")
-			dfa_file.write(self.alphabet + "\n")
 
-			for (sc, s) in dfa_construction[1].items():
-				dfa_file.write("%d \'%s\' %d\n" % (sc[0],sc[1],s))
+		state = self.state_ids.get(subset)
+		if state is None:
+			if len(self.subsets) >= self.cache_size:
+				# The first flush only ends warming up the cache
+				symbols_since_flush = self.symbols_read - self.symbols_at_flush
+				if self.flushes and symbols_since_flush < self.min_symbols_per_state * self.cache_size:
+					self.nfa_fallback = True
+				self.symbols_at_flush = self.symbols_read
+				self.flush()
+				self.flushes += 1
+			self.states_built += 1
+			state = self.state_ids[subset] = len(self.subsets)
+			self.subsets.append(subset)
+			self.next_states.append([None] * len(self.symbol_moves))
+			self.accepting.append(bool(subset & self.accept_mask))
+			self.dead.append(not subset)
+		return state
+
+	def buildTransition(self, state, symbol_id):
+		"""
+		Contributor(s): Patrick Walker
 
-			dfa_file.write(str(dfa_construction[2]) + "\n")
+		Builds and caches the transition out of state on the symbol whose id is
+		symbol_id, and returns the id of the next state. If building the next
+		state flushes the cache, state is rebuilt so the transition is still
+		cached.
+		"""
 
-			dfa_accept_states = dfa_construction[3]
-			for index in range(len(dfa_accept_states)):
-				dfa_accept_states[index] = str(dfa_accept_states[index])
+		subset = self.subsets[state]
+		next_subset = self.nfa.moveSubset(subset, self.symbol_moves[symbol_id])
 
-			dfa_file.write(" ".join(dfa_construction[3]))
+		flushes = self.flushes
+		next_state = self.getState(next_subset)
+		if self.flushes != flushes:
+			state = self.getState(subset)
 
-class DFA:
-	""" Simulates a DFA """
+		self.next_states[state][symbol_id] = next_state
+		return next_state
 
-	def __init__(self, nfa, alphabet):
-		"""
-		Contributor(s): Andres Rivera, Patrick Walker
-		Initializes a DFA from memory using the equivalent DFA of an NFA and the
-		regex's alphabet.
-		"""
-		
-		equivalent_dfa = nfa.constructDFA()
-		self.num_states = len(equivalent_dfa[0])
-		self.alphabet = alphabet
-		self.transitions = equivalent_dfa[1]
-		self.start_state = equivalent_dfa[2]
-		self.accept_states = equivalent_dfa[3]
-		
 	def simulate(self, str):
-		""" 
+		"""
+		Contributor(s): Patrick Walker
+
 		Simulates the DFA on input str.  Returns
 		True if str is in the language of the DFA,
-		and False if not.
+		and False if not. Stops reading str at the dead state
+		of the empty subset.
 		"""
-		current_state = self.start_state
 
-		# For each read in symbol, use the transitions dictionary to transition from current_state to the next state
-		# Then, reassign current_state
-		for symbol in str:
-			current_state = self.transitions[(current_state, symbol)]
+		if self.nfa_fallback:
+			return self.simulateSubsets(self.start_subset, map(self.symbol_ids.__getitem__, str))
+
+		current_state = self.getState(self.start_subset)
+
+		# map reads the symbols from this iterator one at a time, so its length
+		# hint tells how many symbols have been read whenever a state is built
+		symbols = iter(str)
+		symbol_ids = map(self.symbol_ids.__getitem__, symbols)
+		counted = 0
+		for symbol_id in symbol_ids:
+			next_state = self.next_states[current_state][symbol_id]
+			if next_state is None:
+				read = len(str) - length_hint(symbols)
+				self.symbols_read += read - counted
+				counted = read
+				next_state = self.buildTransition(current_state, symbol_id)
+				if self.nfa_fallback:
+					return self.simulateSubsets(self.subsets[next_state], symbol_ids)
+			current_state = next_state
+			if self.dead[current_state]:
+				break
+
+		self.symbols_read += len(str) - length_hint(symbols) - counted
+		return self.accepting[current_state]
+
+	def simulateSubsets(self, subset, symbol_ids):
+		"""
+		Contributor(s): Patrick Walker
+
+		Simulates the NFA from the bitmask of NFA states subset on the
+		remaining symbol ids symbol_ids, without building DFA states. Returns
+		True if it ends in an accept state, and False if not.
+		"""
+
+		move_subset = self.nfa.moveSubset
+		symbol_moves = self.symbol_moves
+		for symbol_id in symbol_ids:
+			subset = move_subset(subset, symbol_moves[symbol_id])
+			if not subset:
+				return False
+
+		return bool(subset & self.accept_mask)
+
+	def cacheStats(self):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns the statistics of the cache: the number of flushes, of DFA
+		states built, of symbols read by the DFA and of states cached now, and
+		whether simulate has fallen back to simulating the NFA.
+		"""
+
+		return {
+			'flushes': self.flushes,
+			'states_built': self.states_built,
+			'symbols_read': self.symbols_read,
+			'cached_states': len(self.subsets),
+			'nfa_fallback': self.nfa_fallback,
+		}
+
+	def simulate_many(self, strings):
+		"""
+		Contributor(s): Patrick Walker
+
+		Returns, for each string in strings, whether it is in the language of
+		the DFA, as a NumPy boolean array (or a list without NumPy installed).
+		"""
 
-		return current_state in (self.accept_states)
\ No newline at end of file
+		results = [self.simulate(string) for string in strings]
+		if np is None:
+			return results
+		return np.array(results, dtype=bool)
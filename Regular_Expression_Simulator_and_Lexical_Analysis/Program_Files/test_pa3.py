@@ -3,11 +3,175 @@
 # Date: July 1, 2020
 # Description: Tests pa3 for comp 370, fall 2020
 
+import itertools
+import sys
+import tempfile
+import time
+
 import pa3
 
+# Number of failed checks: the tests exit with status 1 if there are any
+failures = 0
+
 def read_results_file(filename):
-    file = open(filename)
-    return [True if result == "true" else False for result in file.read().split()]
+    with open(filename) as file:
+        return [True if result == "true" else False for result in file.read().split()]
+
+def check_results(description, results, correct_results):
+    global failures
+    print(f"Testing {description}")
+    if results == correct_results:
+        print("  Correct results")
+    else:
+        print("  Incorrect results")
+        failures += 1
+        print(f"  Your results = {results}")
+        print(f"  Correct results = {correct_results}")
+    print()
+
+def test_search():
+    # Matches are leftmost-longest and do not overlap
+    regex = pa3.RegEx.fromString("a|ab|abc", "abc")
+    check_results("finditer leftmost-longest", list(regex.finditer("abcab")), [(0, 3), (3, 5)])
+    check_results("DFA finditer", list(regex.equivalent_dfa.finditer("abcab")), [(0, 3), (3, 5)])
+    regex = pa3.RegEx.fromString("aa", "a")
+    check_results("finditer overlapping matches", list(regex.finditer("aaaaa")), [(0, 2), (2, 4)])
+    check_results("count overlapping matches", regex.count("aaaaa"), 2)
+
+    # Empty matches are reported where no other match starts, as by Python's re.finditer
+    regex = pa3.RegEx.fromString("a*", "ab")
+    check_results("finditer empty matches", list(regex.finditer("baab")), [(0, 0), (1, 3), (3, 3), (4, 4)])
+
+    # Symbols outside the alphabet cannot be part of a match
+    regex = pa3.RegEx.fromString("ab", "ab")
+    check_results("search outside the alphabet", regex.search("a-b ab"), (4, 6))
+    check_results("search without a match", regex.search("bbba"), None)
+    check_results("count without a match", regex.count("bbba"), 0)
+
+    # Every match is extended to the end of the text before the DFA dies,
+    # which takes quadratic time unless failed extensions are remembered
+    regex = pa3.RegEx.fromString("a|a*b", "ab")
+    start = time.perf_counter()
+    num_matches = regex.count("a" * 20000)
+    check_results("count pathological text", (num_matches, time.perf_counter() - start < 5), (20000, True))
+
+def test_lexer():
+    rules = [("IF", "if"), ("ID", "[a-df-z][a-df-z0-9]*"), ("NUM", "[0-9][0-9]*"), ("SPACE", "__*")]
+    lexer = pa3.Lexer(rules, "abcdfghijklmnopqrstuvwxyz0123456789_")
+
+    # The earlier rule wins a tie, and the longest match wins over rule order
+    check_results("tokenize priority ties", list(lexer.tokenize("if_i")),
+                  [("IF", "if"), ("SPACE", "_"), ("ID", "i")])
+    check_results("tokenize longest match", list(lexer.tokenize("iff__42x")),
+                  [("ID", "iff"), ("SPACE", "__"), ("NUM", "42"), ("ID", "x")])
+
+    # No rule matches the text at position 3
+    try:
+        list(lexer.tokenize("if_-x"))
+        check_results("tokenize no match", None, "LexicalError")
+    except pa3.LexicalError:
+        check_results("tokenize no match", "LexicalError", "LexicalError")
+
+    # Each token ends after one symbol, but the DFA reads to the end of the text
+    # before it dies, which takes quadratic time unless failed reads are remembered
+    lexer = pa3.Lexer([("A", "a"), ("AB", "a*b")], "ab")
+    start = time.perf_counter()
+    num_tokens = sum(1 for token in lexer.tokenize("a" * 20000))
+    check_results("tokenize pathological text", (num_tokens, time.perf_counter() - start < 5), (20000, True))
+
+def test_lazy_dfa():
+    # The full DFA of (0|1)*1(0|1)(0|1)... has a state per suffix of 9 symbols
+    regex = "(0|1)*1" + "(0|1)" * 8
+    strings = [format(i, "b")[1:] for i in range(1, 2 ** 11)]
+    full_results = pa3.RegEx.fromString(regex, "01").simulate_many(strings)
+    full_results = [bool(result) for result in full_results]
+
+    lazy_dfa = pa3.RegEx.fromString(regex, "01", lazy=True).equivalent_dfa
+    results = [lazy_dfa.simulate(str) for str in strings]
+    stats = lazy_dfa.cacheStats()
+    check_results("lazy DFA", (results, stats["flushes"], stats["nfa_fallback"]), (full_results, 0, False))
+
+    # A small cache keeps flushing, so the lazy DFA falls back to the NFA
+    lazy_dfa = pa3.RegEx.fromString(regex, "01", lazy=True, cache_size=16).equivalent_dfa
+    results = [lazy_dfa.simulate(str) for str in strings]
+    stats = lazy_dfa.cacheStats()
+    check_results("lazy DFA NFA fallback", (results, stats["flushes"] > 1, stats["nfa_fallback"]),
+                  (full_results, True, True))
+    check_results("lazy DFA cache bound", stats["cached_states"] <= 16, True)
+
+def compile_cache_hits(regex, alphabet):
+    pa3.RegEx.collect_stats = True
+    try:
+        return pa3.RegEx.fromString(regex, alphabet).stats["cache_hits"]
+    finally:
+        pa3.RegEx.collect_stats = False
+
+def test_compile_cache():
+    pa3.RegEx.compile_cache.clear()
+    first = pa3.RegEx.fromString("(a|b)*abb", "ab")
+    check_results("compile cache miss and hit", (compile_cache_hits("(a|b)*abb", "ab"),
+                  compile_cache_hits("(a|b)*aab", "ab")), (1, 0))
+
+    # Each hit gets its own copy of the compiled automata
+    second = pa3.RegEx.fromString("(a|b)*abb", "ab")
+    check_results("compile cache copies", (second.equivalent_dfa is first.equivalent_dfa,
+                  second.equivalent_nfa is first.equivalent_nfa, second.simulate("babb")), (False, False, True))
+
+    digest = pa3.COMPILE_CACHE_DIGEST
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pa3.RegEx.compile_cache_dir = cache_dir
+        try:
+            hits = []
+            for cache_digest in (digest, digest, "changed source"):
+                pa3.COMPILE_CACHE_DIGEST = cache_digest
+                pa3.RegEx.compile_cache.clear()
+                hits.append(compile_cache_hits("(a|b)*abb", "ab"))
+        finally:
+            pa3.RegEx.compile_cache_dir = None
+            pa3.COMPILE_CACHE_DIGEST = digest
+    # The first regex is saved to the directory, the second loaded from it,
+    # and the third misses since the modules' source changed
+    check_results("compile cache directory", hits, [0, 1, 0])
+
+def build_nfa(regex, ast):
+    builder = pa3.NFABuilder(regex.alphabet)
+    start_state, accept_states = regex.buildFragment(builder, ast)
+    return builder.num_states, builder.edges, start_state, accept_states
+
+def test_hash_consing():
+    regex = pa3.RegEx.parsed("(ab|c)(ab|c)*(a(ab|c)|(ab|c)*b)", "abc")
+    ast = regex.regexToAST()
+    group = ast.root.left.left
+    check_results("hash-consed AST", (ast.root.left.right.left is group, ast.root.right.left.right is group,
+                  ast.root.right.right.left is ast.root.left.right), (True, True, True))
+
+    # Copying the templates of shared subexpressions builds the same NFA as
+    # building each occurrence, which the unshared AST of the same nodes does
+    check_results("hash-consed NFA", build_nfa(regex, ast), build_nfa(regex, pa3.AST(ast.nodes)))
+
+def test_simplify():
+    # Each regex over "abc", its simplified AST's nodes and the rules that simplified it
+    simplifications = [("aN", ["N"], {"annihilation": 1}),
+                       ("ae", ["a"], {"epsilon identity": 1}),
+                       ("a|N", ["a"], {"empty set identity": 1}),
+                       ("ab|ab", ["a", "b", "concat"], {"idempotence": 1}),
+                       ("a|b", [(("a", "b"),)], {"class merging": 1}),
+                       ("e|a*", ["a", "*"], {"epsilon absorption": 1}),
+                       ("ab|ac", ["a", (("b", "c"),), "concat"], {"common-prefix factoring": 1, "class merging": 1}),
+                       ("(a*)*", ["a", "*"], {"star flattening": 1}),
+                       ("(a*|b|e)*", [(("a", "b"),), "*"],
+                        {"epsilon absorption": 1, "star flattening": 1, "class merging": 1}),
+                       ("N*", ["e"], {"star of epsilon or empty set": 1}),
+                       ("(ab|c)(ab|c)*", ["a", "b", "concat", "c", "|", "a", "b", "concat", "c", "|", "*", "concat"], {})]
+    strings = ["".join(symbols) for length in range(5) for symbols in itertools.product("abc", repeat=length)]
+    for regex_string, nodes, rewrites in simplifications:
+        regex = pa3.RegEx.parsed(regex_string, "abc")
+        regex.equivalent_ast = regex.regexToAST()
+        correct_results = regex.constructNFA().simulate_many(strings)
+        regex.equivalent_ast, applied_rewrites = regex.simplifyAST(regex.equivalent_ast)
+        # The simplified regex has the same language
+        check_results(f"simplify {regex_string}", (regex.equivalent_ast.nodes, applied_rewrites,
+                      regex.constructNFA().simulate_many(strings)), (nodes, rewrites, correct_results))
 
 if __name__ == "__main__":
     num_test_files = 20
@@ -28,26 +192,33 @@ if __name__ == "__main__":
                 f.close()
                 if first_line == "Invalid expression":
                     print("  Incorrect results")
+                    failures += 1
                     print("  Regular expression is invalid")
                 else:
-                    # Open string file.
-                    string_file = open(str_filename)
+                    # Read the test strings
+                    with open(str_filename) as string_file:
+                        strings = [str.strip() for str in string_file]
 
                     # Test each string for membership in language of regex
                     results = []
-                    for str in string_file:
-                        results.append(regex.simulate(str.strip()))
+                    for str in strings:
+                        results.append(regex.simulate(str))
+
+                    # Simulate all test strings at once, which has to agree with simulate
+                    batch_results = [bool(result) for result in regex.simulate_many(strings)]
 
                     # Get correct results
                     correct_results = read_results_file(correct_results_filename)
 
                     # Check if correct
-                    if results == correct_results:
+                    if results == correct_results and batch_results == results:
                         print("  Correct results")
                     else:
                         print("  Incorrect results")
+                        failures += 1
                         print(f"  Your results = {results}")
                         print(f"  Correct results = {correct_results}")
+                        print(f"  simulate_many results = {batch_results}")
                     print()
             except pa3.InvalidExpression:
                 correct_results = open(correct_results_filename).readline().strip()
@@ -55,8 +226,51 @@ if __name__ == "__main__":
                     print("  Correct results")
                 else:
                     print("  Incorrect results")
+                    failures += 1
                     print("  Regular expression is valid")
         except OSError as err:
             print(f"Could not open file: {err}")
+            failures += 1
         except Exception as err:
-            print(f"Error simulating dfa: {err}")
\ No newline at end of file
+            print(f"Error simulating dfa: {err}")
+            failures += 1
+
+    try:
+        test_search()
+    except Exception as err:
+        print(f"Error searching: {err}")
+        failures += 1
+
+    try:
+        test_lexer()
+    except Exception as err:
+        print(f"Error tokenizing: {err}")
+        failures += 1
+
+    try:
+        test_lazy_dfa()
+    except Exception as err:
+        print(f"Error simulating lazy dfa: {err}")
+        failures += 1
+
+    try:
+        test_compile_cache()
+    except Exception as err:
+        print(f"Error caching compiled regexes: {err}")
+        failures += 1
+
+    try:
+        test_hash_consing()
+    except Exception as err:
+        print(f"Error sharing subexpressions: {err}")
+        failures += 1
+
+    try:
+        test_simplify()
+    except Exception as err:
+        print(f"Error simplifying regex: {err}")
+        failures += 1
+
+    if failures:
+        print(f"{failures} failed checks")
+        sys.exit(1)
@@ -0,0 +1,208 @@
+# Name: benchmark.py
+# Description: Times each stage of the DFA, NFA and regex simulators on seeded synthetic
+#              automata and regexes across size sweeps, and writes the timings as JSON or CSV
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+# The simulators are standalone modules in each program's directory
+REPOSITORY = os.path.dirname(os.path.abspath(__file__))
+for program in ("Regular_Expression_Simulator_and_Lexical_Analysis",
+				"Nondeterministic_Finite_Automaton_Simulator",
+				"Deterministic_Finite_Automaton_Simulator"):
+	sys.path.append(os.path.join(REPOSITORY, program, "Program_Files"))
+
+import pa1
+import pa2
+import pa3
+
+# Symbols for generated alphabets: 'e' (epsilon) and 'N' (the empty set) are left out
+SYMBOLS = "0123456789abcdfghijklmnopqrstuvwxyzABCDEFGHIJKLMOPQRSTUVWXYZ"
+FIELDS = ("benchmark", "stage", "size", "parameters", "seconds")
+
+def random_dfa(num_states, alphabet_size, seed):
+	"""
+	Returns the text of a DFA file for a random, complete DFA with num_states
+	states over the first alphabet_size SYMBOLS, accepting in about half of
+	its states.
+	"""
+	generator = random.Random(seed)
+	alphabet = SYMBOLS[:alphabet_size]
+	lines = [str(num_states), alphabet]
+	for state in range(1, num_states + 1):
+		for symbol in alphabet:
+			lines.append(f"{state} '{symbol}' {generator.randint(1, num_states)}")
+	accept_states = [state for state in range(1, num_states + 1) if generator.random() < 0.5] or [num_states]
+	lines += ["1", " ".join(map(str, accept_states))]
+	return "\n".join(lines) + "\n"
+
+def random_nfa(num_states, alphabet_size, seed, epsilon_density=0.1, branching=2):
+	"""
+	Returns the text of an NFA file for a random NFA with num_states states over
+	the first alphabet_size SYMBOLS. Each state has up to branching destinations
+	on each symbol (the nondeterminism) and, for each other state, an epsilon
+	transition to it with probability epsilon_density / num_states, so it has
+	about epsilon_density epsilon transitions. About a tenth of the states accept.
+	"""
+	generator = random.Random(seed)
+	alphabet = SYMBOLS[:alphabet_size]
+	lines = [str(num_states), alphabet]
+	for state in range(1, num_states + 1):
+		for symbol in alphabet:
+			for destination in set(generator.randint(1, num_states) for branch in range(branching)):
+				lines.append(f"{state} '{symbol}' {destination}")
+		for destination in range(1, num_states + 1):
+			if generator.random() < epsilon_density / num_states:
+				lines.append(f"{state} 'e' {destination}")
+	accept_states = [state for state in range(1, num_states + 1) if generator.random() < 0.1] or [num_states]
+	lines += ["", "1", " ".join(map(str, accept_states))]
+	return "\n".join(lines) + "\n"
+
+def blow_up_regex(n):
+	"""
+	Returns the text of a regex file for (a|b)*a(a|b)...(a|b), with n copies
+	of (a|b) at the end: strings whose (n + 1)th symbol from the end is a.
+	Its NFA has O(n) states but its DFA has 2^(n + 1) states.
+	"""
+	return "ab\n(a|b)*a" + "(a|b)" * n + "\n"
+
+def random_strings(alphabet, count, length, seed):
+	""" Returns count random strings of the given length over alphabet """
+	generator = random.Random(seed)
+	return ["".join(generator.choice(alphabet) for index in range(length)) for string in range(count)]
+
+def timed(function, *args):
+	""" Returns the value of function(*args) and the seconds it took """
+	start = time.perf_counter()
+	value = function(*args)
+	return value, time.perf_counter() - start
+
+def write_file(directory, filename, text):
+	""" Writes text to the file filename in directory and returns its path """
+	path = os.path.join(directory, filename)
+	with open(path, "w") as file:
+		file.write(text)
+	return path
+
+def benchmark_dfa(directory, size, args):
+	""" Yields the (stage, seconds) timings of pa1 on a random DFA with size states """
+	filename = write_file(directory, f"dfa{size}.txt", random_dfa(size, args.alphabet_size, args.seed))
+	dfa, seconds = timed(pa1.DFA, filename)
+	yield "parse", seconds
+
+	strings = random_strings(dfa.alphabet, args.strings, args.length, args.seed)
+	yield "simulate", timed(lambda: [dfa.simulate(string) for string in strings])[1]
+	yield "simulate_many", timed(lambda: list(dfa.simulate_many(strings)))[1]
+
+def benchmark_nfa(directory, size, args):
+	""" Yields the (stage, seconds) timings of pa2 on a random NFA with size states """
+	filename = write_file(directory, f"nfa{size}.txt",
+						  random_nfa(size, args.alphabet_size, args.seed, args.epsilon_density, args.branching))
+	nfa, seconds = timed(pa2.NFA, filename)
+	yield "parse", seconds
+
+	dfa_construction, seconds = timed(nfa.constructDFA, False, None, args.workers)
+	yield "constructDFA", seconds
+	yield "write", timed(nfa.writeDFA, os.path.join(directory, f"dfa{size}.txt"), dfa_construction)[1]
+
+def benchmark_regex(directory, size, args):
+	""" Yields the (stage, seconds) timings of pa3 on the blow-up regex with size copies of (a|b) """
+	alphabet, regex = blow_up_regex(size).split("\n")[:2]
+	regex_object, seconds = timed(pa3.RegEx.parsed, regex, alphabet)
+	yield "preprocess", seconds
+
+	ast, seconds = timed(regex_object.regexToAST)
+	yield "regexToAST", seconds
+	(regex_object.equivalent_ast, rewrites), seconds = timed(regex_object.simplifyAST, ast)
+	yield "simplify", seconds
+	regex_object.equivalent_nfa, seconds = timed(regex_object.constructNFA)
+	yield "constructNFA", seconds
+	dfa, seconds = timed(pa3.DFA, regex_object.equivalent_nfa, alphabet)
+	yield "constructDFA", seconds
+	# The subset construction alone, on args.workers processes
+	reduced_nfa = regex_object.equivalent_nfa.reduce()
+	yield "subsetConstruction", timed(reduced_nfa.subsetConstruction, None, args.workers)[1]
+
+	strings = random_strings(alphabet, args.strings, args.length, args.seed)
+	yield "simulate_many", timed(lambda: list(dfa.simulate_many(strings)))[1]
+
+# Benchmark name: (function, default sizes, options that shape its inputs)
+BENCHMARKS = {
+	"dfa": (benchmark_dfa, (10, 100, 1000, 10000), ("alphabet_size", "strings", "length", "seed")),
+	"nfa": (benchmark_nfa, (25, 50, 100, 200), ("alphabet_size", "epsilon_density", "branching", "seed", "workers")),
+	"regex": (benchmark_regex, (4, 8, 12, 16), ("strings", "length", "seed", "workers")),
+}
+
+def run(args):
+	"""
+	Returns the result rows of the selected benchmarks: for each size and stage,
+	the fastest time of args.repeat runs.
+	"""
+	rows = []
+	for name in args.benchmarks:
+		function, default_sizes, options = BENCHMARKS[name]
+		parameters = json.dumps({option: getattr(args, option) for option in options})
+		for size in args.sizes or default_sizes:
+			best = {}
+			for repeat in range(args.repeat):
+				with tempfile.TemporaryDirectory() as directory:
+					for stage, seconds in function(directory, size, args):
+						best[stage] = min(seconds, best.get(stage, seconds))
+			for stage, seconds in best.items():
+				rows.append({"benchmark": name, "stage": stage, "size": size, "parameters": parameters, "seconds": seconds})
+				print(f"{name:6} {stage:14} size {size:6}: {seconds:.6f}s", file=sys.stderr)
+	return rows
+
+def write_results(rows, output_format, file):
+	"""
+	Writes the result rows to file as CSV, or as JSON along with the
+	Python version and machine they were measured on.
+	"""
+	if output_format == "json":
+		json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": rows}, file, indent=2)
+		file.write("\n")
+		return
+
+	writer = csv.DictWriter(file, fieldnames=FIELDS)
+	writer.writeheader()
+	writer.writerows(rows)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Times the simulators on seeded synthetic automata and regexes.")
+	parser.add_argument("benchmarks", nargs="*", help="benchmarks to run: dfa, nfa, regex (default: all)")
+	parser.add_argument("--sizes", type=int, nargs="+",
+						help="sizes to sweep: states for dfa and nfa, copies of (a|b) for regex")
+	parser.add_argument("--seed", type=int, default=370, help="seed of the generators (default: 370)")
+	parser.add_argument("--alphabet-size", type=int, default=2, help="alphabet size of dfa and nfa (default: 2)")
+	parser.add_argument("--epsilon-density", type=float, default=0.1,
+						help="average epsilon transitions per nfa state (default: 0.1)")
+	parser.add_argument("--branching", type=int, default=2,
+						help="maximum destinations per nfa state and symbol (default: 2)")
+	parser.add_argument("--workers", type=int, default=1,
+						help="processes of the nfa and regex subset constructions (default: 1)")
+	parser.add_argument("--strings", type=int, default=1000, help="number of strings to simulate (default: 1000)")
+	parser.add_argument("--length", type=int, default=100, help="length of the strings to simulate (default: 100)")
+	parser.add_argument("--repeat", type=int, default=3, help="runs per size, keeping the fastest (default: 3)")
+	parser.add_argument("--format", choices=("json", "csv"), default="json", help="results format (default: json)")
+	parser.add_argument("--output", help="file to write the results to (default: standard output)")
+	args = parser.parse_args()
+	if not set(args.benchmarks) <= set(BENCHMARKS):
+		parser.error(f"benchmarks must be among {', '.join(sorted(BENCHMARKS))}")
+	if not 1 <= args.alphabet_size <= len(SYMBOLS):
+		parser.error(f"--alphabet-size must be between 1 and {len(SYMBOLS)}")
+
+	args.benchmarks = args.benchmarks or sorted(BENCHMARKS)
+	rows = run(args)
+
+	if args.output is None:
+		write_results(rows, args.format, sys.stdout)
+	else:
+		with open(args.output, "w", newline="") as results_file:
+			write_results(rows, args.format, results_file)
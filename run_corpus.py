@@ -0,0 +1,169 @@
+# Name: run_corpus.py
+# Description: Runs every automaton test triple in a directory across a process pool
+#              and reports per-file timings and mismatches as JSON or CSV
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# The simulators are standalone modules in each program's directory
+REPOSITORY = os.path.dirname(os.path.abspath(__file__))
+for program in ("Regular_Expression_Simulator_and_Lexical_Analysis",
+				"Nondeterministic_Finite_Automaton_Simulator",
+				"Deterministic_Finite_Automaton_Simulator"):
+	sys.path.append(os.path.join(REPOSITORY, program, "Program_Files"))
+
+# Kinds of automaton files, by precedence: nfaN wins over the dfaN it is converted to
+KINDS = ("regex", "nfa", "dfa")
+FIELDS = ("kind", "number", "automaton", "compile_seconds", "num_strings",
+		  "simulate_seconds", "strings_per_second", "mismatches", "mismatched_lines", "error")
+
+def read_results_file(filename):
+	"""
+	Returns the expected results in filename: a list of booleans ("Accept" or "true"
+	for accepted strings), or None if the file says the regex is invalid.
+	"""
+	with open(filename) as file:
+		if file.readline().strip() == "Invalid expression":
+			return None
+		file.seek(0)
+		return [result in ("Accept", "true") for result in file.read().split()]
+
+def discover(directory):
+	"""
+	Returns the (kind, number, automaton filename, strings filename, correct results filename)
+	test cases in directory: every dfaN.txt, nfaN.txt or regexN.txt that has both a strN.txt
+	and a correctN.txt next to it, sorted by number.
+	"""
+	automata = {}
+	for filename in os.listdir(directory):
+		match = re.fullmatch(r"(dfa|nfa|regex)(\d+)\.txt", filename)
+		if match is None:
+			continue
+		kind, number = match.group(1), int(match.group(2))
+		if number not in automata or KINDS.index(kind) < KINDS.index(automata[number]):
+			automata[number] = kind
+
+	cases = []
+	for number, kind in sorted(automata.items()):
+		input_filename = os.path.join(directory, f"str{number}.txt")
+		correct_results_filename = os.path.join(directory, f"correct{number}.txt")
+		if os.path.exists(input_filename) and os.path.exists(correct_results_filename):
+			cases.append((kind, number, os.path.join(directory, f"{kind}{number}.txt"),
+						  input_filename, correct_results_filename))
+	return cases
+
+def compile_automaton(kind, filename):
+	"""
+	Returns the compiled automaton for the file filename of the given kind:
+	a pa1 DFA, the pa1 DFA of a pa2 NFA, or a pa3 RegEx. An NFA's DFA is
+	written to a temporary file, so the corpus is never modified.
+	"""
+	import pa1
+
+	if kind == "dfa":
+		return pa1.DFA(filename)
+
+	if kind == "nfa":
+		import pa2
+		nfa = pa2.NFA(filename)
+		with tempfile.TemporaryDirectory() as directory:
+			dfa_filename = os.path.join(directory, "dfa.txt")
+			nfa.toDFA(dfa_filename)
+			return pa1.DFA(dfa_filename)
+
+	import pa3
+	return pa3.RegEx(filename)
+
+def run_case(case):
+	"""
+	Compiles and simulates one test case, and returns its row of the summary.
+	"""
+	kind, number, automaton_filename, input_filename, correct_results_filename = case
+	row = dict.fromkeys(FIELDS)
+	row.update(kind=kind, number=number, automaton=os.path.basename(automaton_filename))
+
+	try:
+		correct_results = read_results_file(correct_results_filename)
+
+		start = time.perf_counter()
+		try:
+			automaton = compile_automaton(kind, automaton_filename)
+		except Exception as err:
+			# An invalid regex is a pass when it is expected to be invalid
+			if correct_results is None and type(err).__name__ == "InvalidExpression":
+				row.update(compile_seconds=time.perf_counter() - start, mismatches=0)
+				return row
+			raise
+		row["compile_seconds"] = time.perf_counter() - start
+		if correct_results is None:
+			raise ValueError("expected an invalid expression")
+
+		with open(input_filename) as string_file:
+			strings = [str.strip() for str in string_file]
+		start = time.perf_counter()
+		results = [bool(result) for result in automaton.simulate_many(strings)]
+		row["simulate_seconds"] = time.perf_counter() - start
+
+		mismatched_lines = [line for line, (result, correct_result)
+							in enumerate(zip(results, correct_results), 1) if result != correct_result]
+		mismatched_lines += range(min(len(results), len(correct_results)) + 1,
+								  max(len(results), len(correct_results)) + 1)
+
+		row["num_strings"] = len(strings)
+		row["strings_per_second"] = len(strings) / row["simulate_seconds"] if row["simulate_seconds"] else None
+		row["mismatches"] = len(mismatched_lines)
+		row["mismatched_lines"] = mismatched_lines
+	except Exception as err:
+		row["error"] = f"{type(err).__name__}: {err}"
+
+	return row
+
+def write_summary(rows, output_format, file):
+	"""
+	Writes the summary rows to file as a JSON list of objects or as CSV,
+	where mismatched line numbers are separated by spaces.
+	"""
+	if output_format == "json":
+		json.dump(rows, file, indent=2)
+		file.write("\n")
+		return
+
+	writer = csv.DictWriter(file, fieldnames=FIELDS)
+	writer.writeheader()
+	for row in rows:
+		row = dict(row)
+		if row["mismatched_lines"] is not None:
+			row["mismatched_lines"] = " ".join(map(str, row["mismatched_lines"]))
+		writer.writerow(row)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Runs the dfaN/nfaN/regexN + strN + correctN test triples "
+									 "of a directory in parallel and summarizes the results.")
+	parser.add_argument("directory", help="directory holding the test triples")
+	parser.add_argument("--format", choices=("json", "csv"), default="json", help="summary format (default: json)")
+	parser.add_argument("--output", help="file to write the summary to (default: standard output)")
+	parser.add_argument("--workers", type=int, help="number of worker processes (default: one per CPU)")
+	args = parser.parse_args()
+
+	# Hand cases out in chunks so thousands of small automata do not each cost a round trip
+	cases = discover(args.directory)
+	workers = args.workers or os.cpu_count() or 1
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		rows = list(executor.map(run_case, cases, chunksize=max(1, len(cases) // (4 * workers))))
+
+	if args.output is None:
+		write_summary(rows, args.format, sys.stdout)
+	else:
+		with open(args.output, "w", newline="") as summary_file:
+			write_summary(rows, args.format, summary_file)
+
+	failures = sum(1 for row in rows if row["error"] is not None or row["mismatches"])
+	print(f"{len(rows) - failures} of {len(rows)} test files passed", file=sys.stderr)
+	sys.exit(1 if failures else 0)